@@ -28,7 +28,13 @@ class Config:
     MAX_CONCURRENT_VIDEOS_CHANNEL = 5  # Max videos a channel can process at the same time
     QUEUE_SIZE_LIMIT = 1000      # Maximum number of videos that can be in all queues combined
     CHECK_INTERVAL = 30          # Seconds between polling video status via JUNK_CHANNEL
+    POLL_CONCURRENCY = 8         # Max tracked videos polled in parallel per CHECK_INTERVAL tick
+    SEND_RESULTS_TIMEOUT = 60    # Seconds allowed for sending/editing a processed video before giving up and cleaning up
+    MAX_FLOOD_WAIT = 60          # Longest FloodWait (seconds) slept through before retrying a video copy/edit once
+    USERBOT_STATUS_TTL = 5       # Seconds an is_userbot_connected result is reused before calling get_me again
+    ADMIN_REPORT_BATCH_DELAY = 5 # Seconds to collect routine admin reports before sending them as one message
     K = 0.033                    # Constant for video processing time estimation (adjust based on testing)
+    CODEC_CACHE_SIZE = 512       # Max detected codecs remembered by file_unique_id
     ALLOWED_FORMATS = [          # Allowed video codec/format combinations
         ("h264", "mkv"),
         ("h264", "mp4"),
@@ -48,10 +54,19 @@ class Config:
         (2, "Premium+", 3, 200),
         (3, "Premium Pro", 5, 300),
     ]
+    PLAN_PRICE_BY_CHANNELS = {channels: price for _, _, channels, price in PLANS}  # {channels: monthly_price}
+    MAX_PLAN_CHANNELS = max(PLAN_PRICE_BY_CHANNELS) if PLANS else 0
+    PENDING_UPGRADE_TTL = 1800   # Seconds an unconfirmed upgrade offer stays valid (30 minutes)
+    MAX_PENDING_UPGRADES = 10000 # Max unconfirmed upgrade offers kept in memory
 
 
     # --- Database ---
     DATABASE_URL = "data/premium_users.db"
+    USER_CACHE_TTL = 600         # Seconds a cached user profile (ban/channel/premium) stays valid
+    MAX_CACHED_PROFILES = 10000  # Max user profiles kept in the in-process cache
+    CHANNEL_CACHE_TTL = 300      # Seconds a cached channel activation status stays valid
+    MAX_CACHED_CHANNELS = 5000   # Max channel activation statuses kept in the in-process cache
+    REGISTERED_USERS_CACHE_SIZE = 50000  # Max user IDs remembered as already registered
     
     # --- Bot Links ---
     BOT_ADMIN_LINK = "http://t.me/VideoResBot?startchannel&admin=post_messages+edit_messages"
@@ -1,6 +1,10 @@
-from datetime import datetime
-from typing import Dict, Set, Tuple, Optional, Union
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Coroutine, Dict, Set, Tuple, Optional, Union
 from pyrogram import Client
+from config.config import Config
+from utils.logger import logger
 from utils.queue_manager import (
     user_video_queue,
     channel_video_queue,
@@ -8,16 +12,43 @@ from utils.queue_manager import (
     active_videos_count_channels
 )
 
+# Bound once so the queue-full check on every incoming video skips the Config lookup
+_MAX_QUEUED_VIDEOS = Config.MAX_QUEUED_VIDEOS
+_PENDING_UPGRADE_TTL = Config.PENDING_UPGRADE_TTL
+_MAX_PENDING_UPGRADES = Config.MAX_PENDING_UPGRADES
+
+@dataclass(slots=True, frozen=True)
+class VideoJob:
+    """Tracking record of a video waiting for Telegram to produce its alternative qualities.
+    Immutable, so a record fetched once stays a consistent snapshot even if cleanup drops it meanwhile."""
+    user_id: int                              # -1 for channel videos
+    scheduled_msg_id: int
+    timestamp: float                          # time.monotonic(), so timeout checks are immune to clock changes
+    original_size: int
+    duration: int
+    owner: Union[int, Tuple[int, int]]        # user_id, or (channel_id, message_id) for channel posts
+    caption: Optional[tuple] = None           # Channel post's (caption, caption_entities), reused when it is edited
+
+    @property
+    def is_channel(self) -> bool:
+        return isinstance(self.owner, tuple)
+
 class State:
-    """Class to manage the application state"""
-    # Dictionary to store video information: {transfer_msg_id: (user_id, scheduled_msg_id, timestamp, original_size, duration)}
-    video_info: Dict[int, Tuple[int, int, datetime, int, int]] = {}
+    """Class to manage the application state.
+    
+    All state lives in class attributes and State is never instantiated, so it
+    declares no instance slots (and cannot grow a per-instance __dict__).
+    """
+    __slots__ = ()
+
+    # Tracked videos waiting for their alternative qualities: {transfer_msg_id: VideoJob}
+    video_info: Dict[int, VideoJob] = {}
 
     # Set to keep track of users with active videos
     active_users: Set[int] = set()
 
-    # Dictionary to track which transfer_msg_id belongs to which user
-    user_videos: Dict[int, Union[int, Tuple[int, int]]] = {}
+    # Reverse index of video_info for private videos: {user_id: {transfer_msg_id, ...}}
+    user_to_transfer_ids: Dict[int, Set[int]] = {}
 
     # Global event loop
     main_event_loop = None
@@ -28,9 +59,13 @@ class State:
 
     # Map scheduled_message_id (from destination channel) to transfer_message_id
     scheduled_to_transfer_map: Dict[int, int] = {}
+    
+    # Inverse of scheduled_to_transfer_map; both are kept in sync by map_scheduled_message/unmap_transfer
+    transfer_to_scheduled_map: Dict[int, int] = {}
 
-    # Dictionary to store pending upgrade payloads keyed by a unique ID
-    pending_upgrades: Dict[str, str] = {}
+    # Dictionary to store pending upgrade payloads keyed by a unique ID: {unique_id: (expires_at, payload)}
+    # Use add_pending_upgrade/pop_pending_upgrade so entries expire and the dict stays bounded
+    pending_upgrades: Dict[str, Tuple[float, str]] = {}
     
     # Dictionary to store pending channel setups: {user_id: channel_id}
     pending_channel_setups: Dict[int, int] = {}
@@ -38,6 +73,11 @@ class State:
     # Dictionary to store pending premium channel setups: {user_id: channel_id}
     pending_premium_channel_setups: Dict[int, int] = {}
     
+    # Inverses of the two dicts above: {channel_id: user_id}
+    # Kept in sync by add_pending_channel_setup/remove_pending_channel_setup
+    pending_channel_setup_users: Dict[int, int] = {}
+    pending_premium_channel_setup_users: Dict[int, int] = {}
+    
     # References to queues and counters from queue_manager
     user_video_queue = user_video_queue
     channel_video_queue = channel_video_queue
@@ -47,6 +87,12 @@ class State:
     # Set to track message IDs currently being processed (deduplication)
     processing_messages: Set[int] = set()
     
+    # Routine admin reports waiting to be sent in batches (see utils.admin_reports)
+    admin_report_queue: "asyncio.Queue[str]" = asyncio.Queue()
+    
+    # Fire-and-forget tasks kept referenced until done so they can be cancelled on shutdown
+    background_tasks: Set[asyncio.Task] = set()
+    
     # Flag to prevent duplicate handler registration
     _handlers_registered: bool = False
 
@@ -54,4 +100,103 @@ class State:
     def initialize(cls, bot_instance, userbot_instance):
         """Initialize the client instances in the State class."""
         cls.bot = bot_instance
-        cls.userbot = userbot_instance 
\ No newline at end of file
+        cls.userbot = userbot_instance
+
+    @classmethod
+    def is_queue_full(cls) -> bool:
+        """Return True if the number of tracked videos has reached MAX_QUEUED_VIDEOS."""
+        return len(cls.video_info) >= _MAX_QUEUED_VIDEOS
+
+    @classmethod
+    def add_pending_upgrade(cls, unique_id: str, payload: str) -> None:
+        """Store an upgrade payload that expires after PENDING_UPGRADE_TTL seconds."""
+        now = time.time()
+        # Every entry shares the same TTL, so insertion order is expiry order
+        # and expired entries are always at the front of the dict
+        while cls.pending_upgrades:
+            oldest_id = next(iter(cls.pending_upgrades))
+            if cls.pending_upgrades[oldest_id][0] > now and len(cls.pending_upgrades) < _MAX_PENDING_UPGRADES:
+                break
+            del cls.pending_upgrades[oldest_id]
+        cls.pending_upgrades[unique_id] = (now + _PENDING_UPGRADE_TTL, payload)
+
+    @classmethod
+    def pop_pending_upgrade(cls, unique_id: str) -> Optional[str]:
+        """Remove and return an upgrade payload, or None if it is unknown or expired."""
+        entry = cls.pending_upgrades.pop(unique_id, None)
+        if entry is None or entry[0] <= time.time():
+            return None
+        return entry[1]
+
+    @classmethod
+    def add_background_task(cls, coro: Coroutine) -> asyncio.Task:
+        """Schedule a coroutine on the main loop and keep a reference to it until it finishes."""
+        loop = cls.main_event_loop or asyncio.get_running_loop()
+        task = loop.create_task(coro)
+        cls.background_tasks.add(task)
+        task.add_done_callback(cls.background_tasks.discard)
+        return task
+
+    @classmethod
+    async def cancel_background_tasks(cls) -> None:
+        """Cancel all tracked background tasks and wait for them to finish."""
+        tasks = set(cls.background_tasks)
+        if not tasks:
+            return
+        for task in tasks:
+            task.cancel()
+        done, _ = await asyncio.wait(tasks)
+        # Retrieve failures so they are reported instead of silently dropped
+        for task in done:
+            if not task.cancelled() and task.exception() is not None:
+                logger.error(f"[❌] Background task {task.get_name()} failed during shutdown: {task.exception()}")
+
+    @classmethod
+    def _pending_setup_maps(cls, premium: bool) -> Tuple[Dict[int, int], Dict[int, int]]:
+        """Return the (user -> channel, channel -> user) dicts for regular or premium channel setups."""
+        if premium:
+            return cls.pending_premium_channel_setups, cls.pending_premium_channel_setup_users
+        return cls.pending_channel_setups, cls.pending_channel_setup_users
+
+    @classmethod
+    def add_pending_channel_setup(cls, user_id: int, channel_id: int, premium: bool = False) -> None:
+        """Remember that user_id is waiting for the bot to be made admin in channel_id."""
+        by_user, by_channel = cls._pending_setup_maps(premium)
+        previous_channel_id = by_user.get(user_id)
+        if previous_channel_id is not None and by_channel.get(previous_channel_id) == user_id:
+            del by_channel[previous_channel_id]
+        by_user[user_id] = channel_id
+        by_channel[channel_id] = user_id
+
+    @classmethod
+    def find_pending_channel_setup(cls, channel_id: int) -> Optional[Tuple[int, bool]]:
+        """Return (user_id, is_premium) for the setup waiting on channel_id, regular setups first, or None."""
+        user_id = cls.pending_channel_setup_users.get(channel_id)
+        if user_id is not None:
+            return user_id, False
+        user_id = cls.pending_premium_channel_setup_users.get(channel_id)
+        if user_id is not None:
+            return user_id, True
+        return None
+
+    @classmethod
+    def remove_pending_channel_setup(cls, user_id: int, premium: bool = False) -> None:
+        """Forget a user's pending channel setup in both directions."""
+        by_user, by_channel = cls._pending_setup_maps(premium)
+        channel_id = by_user.pop(user_id, None)
+        if channel_id is not None and by_channel.get(channel_id) == user_id:
+            del by_channel[channel_id]
+
+    @classmethod
+    def map_scheduled_message(cls, scheduled_msg_id: int, transfer_msg_id: int) -> None:
+        """Record the scheduled <-> transfer message mapping in both directions."""
+        cls.scheduled_to_transfer_map[scheduled_msg_id] = transfer_msg_id
+        cls.transfer_to_scheduled_map[transfer_msg_id] = scheduled_msg_id
+
+    @classmethod
+    def unmap_transfer(cls, transfer_msg_id: int) -> Optional[int]:
+        """Remove both mapping directions for a transfer message and return its scheduled ID, if any."""
+        scheduled_msg_id = cls.transfer_to_scheduled_map.pop(transfer_msg_id, None)
+        if scheduled_msg_id is not None:
+            cls.scheduled_to_transfer_map.pop(scheduled_msg_id, None)
+        return scheduled_msg_id
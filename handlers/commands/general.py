@@ -7,9 +7,9 @@ from config.state import State
 from config import messages
 from utils.db import db
 from config.config import Config
-from utils.queue_manager import get_active_videos_count
+from utils.queue_manager import get_active_videos_count_user
 from pyrogram.types import LinkPreviewOptions
-from utils.decorators import combined_user_check, handle_errors
+from utils.decorators import combined_user_check, handle_errors, get_profile
 
 @combined_user_check
 @handle_errors()
@@ -21,7 +21,7 @@ async def start_command_handler(client: Client, message: Message) -> None:
     logger.info(f"[👋] New /start command from user {user_id} ({user_name})")
     
     # Check if user has a channel configured
-    has_channel = db.has_user_channel(user_id)
+    has_channel = get_profile(message).has_channel
     
     # Send appropriate welcome message based on channel setup
     if has_channel:
@@ -50,7 +50,7 @@ async def cancel_command_handler(client: Client, message: Message) -> None:
     user_name = message.from_user.first_name
     
     # Check if user has any active videos
-    active_count = get_active_videos_count(user_id, is_channel=False)
+    active_count = get_active_videos_count_user(user_id)
     
     if active_count == 0 and user_id not in State.active_users:
         logger.info(f"[❌] User {user_id} ({user_name}) tried to cancel but has no active videos")
@@ -58,13 +58,12 @@ async def cancel_command_handler(client: Client, message: Message) -> None:
         return
     
     transfer_msg_id = None
-    for t_id, u_info in list(State.user_videos.items()):
-        if isinstance(u_info, int) and u_info == user_id:
-            if t_id in State.video_info:
-                transfer_msg_id = t_id
-                break
-            else:
-                logger.warning(f"[⚠️] Found stale user_videos entry for user {user_id}, transfer ID {t_id} not in video_info during cancel.")
+    for t_id in sorted(State.user_to_transfer_ids.get(user_id, ())):
+        if t_id in State.video_info:
+            transfer_msg_id = t_id
+            break
+        else:
+            logger.warning(f"[⚠️] Found stale user_to_transfer_ids entry for user {user_id}, transfer ID {t_id} not in video_info during cancel.")
         
     if not transfer_msg_id:
         logger.warning(f"[⚠️] Could not find active video processing for user {user_id} ({user_name}) during cancel.")
@@ -74,13 +73,13 @@ async def cancel_command_handler(client: Client, message: Message) -> None:
         await message.reply_text(messages.CANCEL_NO_ACTIVE_VIDEO, reply_markup=ReplyKeyboardRemove())
         return
     
-    _, scheduled_msg_id, _, _, _ = State.video_info[transfer_msg_id]
+    scheduled_msg_id = State.video_info[transfer_msg_id].scheduled_msg_id
     
     await delete_scheduled_message(scheduled_msg_id)
     clean_up_tracking_info(transfer_msg_id, user_id)
     
     # Check if user still has active videos AFTER cleanup
-    remaining_count = get_active_videos_count(user_id, is_channel=False)
+    remaining_count = get_active_videos_count_user(user_id)
     
     if remaining_count > 0:
         # Keep user in active_users as they still have videos
@@ -292,7 +291,7 @@ async def handle_channel_shared(client: Client, message: Message) -> None:
             logger.info(f"[ℹ️] Bot not admin in channel {channel_id} or error checking: {e}")
         
         # Store channel temporarily until bot is added as admin
-        State.pending_channel_setups[user_id] = channel_id
+        State.add_pending_channel_setup(user_id, channel_id)
         
         # Ask user to add bot as admin with inline button
         inline_keyboard = InlineKeyboardMarkup([
@@ -370,33 +369,17 @@ async def handle_chat_member_updated(client: Client, chat_member_updated) -> Non
                 await handle_bot_removed_from_channel(client, channel_id)
                 return
             
-            # Find which user was waiting for this channel setup
-            user_id = None
-            is_premium_channel = False
-            
-            # Check regular channel setups first
-            for pending_user_id, pending_channel_id in State.pending_channel_setups.items():
-                if pending_channel_id == channel_id:
-                    user_id = pending_user_id
-                    is_premium_channel = False
-                    break
-            
-            # If not found, check premium channel setups
-            if not user_id:
-                for pending_user_id, pending_channel_id in State.pending_premium_channel_setups.items():
-                    if pending_channel_id == channel_id:
-                        user_id = pending_user_id
-                        is_premium_channel = True
-                        break
-            
-            if not user_id:
+            # Find which user was waiting for this channel setup (regular setups take priority)
+            pending_setup = State.find_pending_channel_setup(channel_id)
+            if pending_setup is None:
                 return
+            user_id, is_premium_channel = pending_setup
             
             # Handle regular channel setup
             if not is_premium_channel:
                 # Store the channel in database and complete setup
                 if db.set_user_channel(user_id, channel_id):
-                    del State.pending_channel_setups[user_id]
+                    State.remove_pending_channel_setup(user_id)
                     await client.send_message(user_id, messages.CHANNEL_SETUP_SUCCESS, reply_markup=ReplyKeyboardRemove())
                     logger.info(f"[✅] Channel setup completed for user {user_id}, channel {channel_id}")
                 else:
@@ -406,7 +389,7 @@ async def handle_chat_member_updated(client: Client, chat_member_updated) -> Non
             else:
                 # Add premium channel to database
                 if db.add_channel(channel_id, user_id):
-                    del State.pending_premium_channel_setups[user_id]
+                    State.remove_pending_channel_setup(user_id, premium=True)
                     
                     # Get current channel count for success message
                     existing_channels = db.get_user_channels(user_id)
@@ -6,7 +6,7 @@ from utils.db import db
 from config import messages
 from handlers.payment.helpers import create_premium_management_keyboard
 from handlers.payment.helpers import get_premium_display_info
-from utils.decorators import combined_user_check, handle_errors
+from utils.decorators import combined_user_check, handle_errors, get_profile
 
 @combined_user_check
 @handle_errors()
@@ -15,7 +15,7 @@ async def handle_premium_purchase_command(client: Client, message: Message) -> N
     user_id = message.from_user.id
     logger.info(f"[💲] Received /premium command from user {user_id}")
 
-    status, text, markup = await get_premium_display_info(user_id)
+    status, text, markup = await get_premium_display_info(user_id, get_profile(message))
     
     if status is None:
         # Error occurred
@@ -79,9 +79,9 @@ def register_payment_handlers(app: Client):
         # Determine regex pattern based on handler name convention
         callback_pattern = None
         if handler_name == "handle_plan_selection":
-            callback_pattern = r"select_plan_\d+"
+            callback_pattern = r"select_plan_(\d+)"
         elif handler_name == "handle_upgrade_plan_selection":
-            callback_pattern = r"upgrade_plan_\d+"
+            callback_pattern = r"upgrade_plan_(\d+)"
         elif handler_name == "handle_premium_menu_button":
             callback_pattern = r"premium_menu"
         elif handler_name == "handle_upgrade_premium_button":
@@ -19,12 +19,13 @@ async def handle_add_channel_button(client: Client, callback_query: CallbackQuer
         await callback_query.answer()
         user_id = callback_query.from_user.id
         
-        if not db.is_user_premium(user_id):
+        profile = db.get_user_profile(user_id)
+        if not profile.is_premium:
             await send_error_message(callback_query.message, messages.ERROR_NOT_PREMIUM)
             return
         
         channels = db.get_user_channels(user_id)
-        max_channels = db.get_max_channels(user_id)
+        max_channels = profile.max_channels
         current_channels = len(channels)
         
         if current_channels >= max_channels:
@@ -82,7 +83,8 @@ async def handle_channel_selection(client: Client, message: types.Message) -> No
             logger.info(f"[ℹ️] Ignoring chat_shared with button_id={message.chat_shared.button_id} (not premium system)")
             return
         
-        if not db.is_user_premium(user_id):
+        profile = db.get_user_profile(user_id)
+        if not profile.is_premium:
             await send_error_message(message, messages.ERROR_NOT_PREMIUM)
             return
             
@@ -105,7 +107,7 @@ async def handle_channel_selection(client: Client, message: types.Message) -> No
                 return
         
         current_channels = len(existing_channels)
-        max_channels = db.get_max_channels(user_id)
+        max_channels = profile.max_channels
         
         if current_channels >= max_channels:
             limit_text = messages.channel_limit_reached_on_select_text(current_channels, max_channels)
@@ -147,7 +149,7 @@ async def handle_channel_selection(client: Client, message: types.Message) -> No
         
         # Store channel temporarily until bot is added as admin
         from config.state import State
-        State.pending_premium_channel_setups[user_id] = chat_id
+        State.add_pending_channel_setup(user_id, chat_id, premium=True)
         
         # Ask user to add bot as admin with inline button
         from config.config import Config
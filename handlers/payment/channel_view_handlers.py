@@ -17,7 +17,7 @@ async def handle_view_channels_button(client: Client, callback_query: CallbackQu
         await callback_query.answer()
         user_id = callback_query.from_user.id
         
-        if not db.is_user_premium(user_id):
+        if not db.get_user_profile(user_id).is_premium:
             await send_error_message(callback_query.message, messages.ERROR_NOT_PREMIUM)
             return
             
@@ -3,7 +3,9 @@
 from config.config import Config
 from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton 
 from datetime import datetime
-from utils.db import db
+from functools import lru_cache
+from typing import Optional
+from utils.db import db, UserProfile
 from utils.logger import logger
 from config import messages
 from utils.decorators import get_plan_name, send_error_message
@@ -12,6 +14,11 @@ from utils.decorators import get_plan_name, send_error_message
 
 # --- Keyboard Creation Helper Functions --- ADDED from menu_handlers
 
+# Static buttons reused across keyboards (only dynamic rows are built per call)
+BACK_TO_MENU_BUTTON = InlineKeyboardButton(messages.BUTTON_BACK_TO_MENU, callback_data="premium_menu")
+BACK_TO_PLANS_BUTTON = InlineKeyboardButton(messages.BUTTON_BACK_TO_PLANS, callback_data="premium_menu")
+BACK_TO_MENU_KEYBOARD = InlineKeyboardMarkup([[BACK_TO_MENU_BUTTON]])
+
 def create_premium_management_keyboard(user_id: int, num_channels: int, max_channels: int, is_trial: bool = False) -> InlineKeyboardMarkup:
     """Creates the keyboard with management options for premium users."""
     buttons = [
@@ -21,8 +28,7 @@ def create_premium_management_keyboard(user_id: int, num_channels: int, max_chan
         ]
     ]
     # Add upgrade button only if not on max plan and not a trial user
-    max_plan_channels = max(plan[2] for plan in Config.PLANS) if Config.PLANS else 0
-    if max_channels < max_plan_channels and not is_trial:
+    if max_channels < Config.MAX_PLAN_CHANNELS and not is_trial:
         buttons.append([InlineKeyboardButton(messages.BUTTON_UPGRADE_PLAN, callback_data="upgrade_premium")])
         
     return InlineKeyboardMarkup(buttons)
@@ -43,6 +49,23 @@ def create_plans_keyboard(user_id: int = None) -> InlineKeyboardMarkup:
 
     return InlineKeyboardMarkup(buttons)
 
+def _build_duration_keyboard(channels: int, monthly_price: int) -> InlineKeyboardMarkup:
+    """Creates the keyboard with subscription duration options for a plan (Prices in Stars)."""
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton(f"1 Month - {monthly_price} ⭐", callback_data=f"buy_premium_{channels}_1")],
+        [InlineKeyboardButton(f"3 Months - {monthly_price * 3} ⭐", callback_data=f"buy_premium_{channels}_3")],
+        [InlineKeyboardButton(f"6 Months - {monthly_price * 6} ⭐", callback_data=f"buy_premium_{channels}_6")],
+        [InlineKeyboardButton(f"12 Months - {monthly_price * 12} ⭐", callback_data=f"buy_premium_{channels}_12")],
+        [BACK_TO_PLANS_BUTTON]
+    ])
+
+# Duration keyboards are static per plan, so build them once: {channels: InlineKeyboardMarkup}
+DURATION_KEYBOARDS = {
+    channels: _build_duration_keyboard(channels, price)
+    for channels, price in Config.PLAN_PRICE_BY_CHANNELS.items()
+}
+
+@lru_cache(maxsize=None)
 def create_upgrade_plans_keyboard(current_max_channels: int) -> InlineKeyboardMarkup:
      """Creates the keyboard for selecting a plan to upgrade to."""
      buttons = []
@@ -50,21 +73,25 @@ def create_upgrade_plans_keyboard(current_max_channels: int) -> InlineKeyboardMa
          if channels > current_max_channels:
              button_text = f"Upgrade to {name} ({channels} channels)"
              buttons.append([InlineKeyboardButton(button_text, callback_data=f"upgrade_plan_{channels}")])
-     buttons.append([InlineKeyboardButton(messages.BUTTON_BACK_TO_MENU, callback_data="premium_menu")])
+     buttons.append([BACK_TO_MENU_BUTTON])
      return InlineKeyboardMarkup(buttons)
 
-async def get_premium_display_info(user_id):
-    """Common helper function to get premium display information for a user"""
-    premium_details = db.get_user_premium_details(user_id)
+async def get_premium_display_info(user_id, profile: Optional[UserProfile] = None):
+    """Common helper function to get premium display information for a user.
+    Pass the already-loaded profile (see decorators.get_profile) to skip the database lookup."""
+    if profile is not None:
+        premium_details = (profile.is_premium, profile.expiry_ts, profile.max_channels, profile.is_trial)
+    else:
+        premium_details = db.get_user_premium_details(user_id)
     if premium_details is None:
         return None, messages.ERROR_PREMIUM_DATA, None
         
-    is_premium, expiry_iso, max_channels, is_trial = premium_details
+    is_premium, expiry_ts, max_channels, is_trial = premium_details
     
-    if is_premium and expiry_iso:
+    if is_premium and expiry_ts:
         # Premium user: Show status and management options
         try:
-            expiry_dt = datetime.fromisoformat(expiry_iso)
+            expiry_dt = datetime.fromtimestamp(expiry_ts)
             now = datetime.now()
             days_remaining = (expiry_dt - now).days if expiry_dt > now else 0
             expiry_date_str = expiry_dt.strftime("%d-%m-%Y")
@@ -13,6 +13,13 @@ from config import messages
 from config.config import Config
 from config.state import State 
 
+async def _safe_reply(message: types.Message, text: str) -> None:
+    """Send a non-critical reply, logging instead of raising on failure"""
+    try:
+        await message.reply_text(text)
+    except Exception as e:
+        logger.error(f"[❌] Failed to send payment confirmation to user {message.from_user.id}: {e}")
+
 async def handle_premium_purchase_button(client: Client, callback_query: CallbackQuery) -> None:
     """Handle the buy premium button callback (Sends Purchase Invoice)"""
     try:
@@ -28,11 +35,7 @@ async def handle_premium_purchase_button(client: Client, callback_query: Callbac
         plan_name = get_plan_name(channels)
             
         # --- Get monthly price from Config.PLANS ---
-        monthly_price = 0
-        for _, _, plan_channels, price in Config.PLANS:
-             if plan_channels == channels:
-                  monthly_price = price
-                  break
+        monthly_price = Config.PLAN_PRICE_BY_CHANNELS.get(channels, 0)
         
         if monthly_price <= 0:
              logger.error(f"Could not find valid price for purchase plan with {channels} channels in Config.PLANS")
@@ -79,12 +82,12 @@ async def handle_confirm_upgrade(client: Client, callback_query: CallbackQuery)
         unique_upgrade_id = parts[2]
         
         # Retrieve the full payload from State
-        if not hasattr(State, 'pending_upgrades') or unique_upgrade_id not in State.pending_upgrades:
-             logger.error(f"Pending upgrade ID {unique_upgrade_id} not found in State for user {user_id}.")
+        payload = State.pop_pending_upgrade(unique_upgrade_id) # Retrieve and remove
+        if payload is None:
+             logger.error(f"Pending upgrade ID {unique_upgrade_id} not found or expired in State for user {user_id}.")
              await send_error_message(callback_query.message, "Upgrade session expired or invalid. Please try again.") # Specific error
              return
              
-        payload = State.pending_upgrades.pop(unique_upgrade_id) # Retrieve and remove
         logger.info(f"[🔓] Retrieved pending upgrade payload for ID {unique_upgrade_id}: {payload}")
         
         payload_parts = payload.split('_')
@@ -205,7 +208,7 @@ async def handle_successful_payment(client: Client, message: types.Message) -> N
             
             if success:
                 expiry_date_str = expiry_date.strftime("%d-%m-%Y") # Get expiry from calculation above
-                await message.reply_text(messages.successful_payment_text(expiry_date_str))
+                State.add_background_task(_safe_reply(message, messages.successful_payment_text(expiry_date_str)))
                 logger.info(f"[✅] User {user_id} premium activated/updated via set_user_premium. Expires: {expiry_date_str}, Channels: {channels}")
             else:
                 logger.error(f"[❌] Failed to update database using set_user_premium for user {user_id}! Payload: {payload}")
@@ -226,7 +229,7 @@ async def handle_successful_payment(client: Client, message: types.Message) -> N
             if success:
                 # Determine plan name (Use helper)
                 new_plan_name = get_plan_name(new_channels)
-                await message.reply_text(messages.upgrade_successful_text(new_plan_name, new_channels))
+                State.add_background_task(_safe_reply(message, messages.upgrade_successful_text(new_plan_name, new_channels)))
                 logger.info(f"[✅] User {user_id} successfully upgraded to {new_channels} channels. Charge ID: {telegram_charge_id}")
             else:
                 logger.error(f"[❌] Failed to update database for user {user_id} after successful upgrade payment! Charge ID: {telegram_charge_id}")
@@ -4,16 +4,29 @@ from pyrogram import Client
 from pyrogram.types import (
     CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 )
-from datetime import datetime
-import uuid 
+import asyncio
+import secrets
+import time
 from utils.logger import logger
 from utils.db import db
 from config.state import State
-from .helpers import create_upgrade_plans_keyboard
+from .helpers import create_upgrade_plans_keyboard, DURATION_KEYBOARDS, BACK_TO_MENU_BUTTON, BACK_TO_MENU_KEYBOARD
 from .helpers import get_premium_display_info, create_plans_keyboard
 from config import messages
 from config.config import Config
-from utils.decorators import get_plan_name, check_user_ban, handle_errors, send_error_message 
+from utils.decorators import get_plan_name, check_user_ban, handle_errors, send_error_message, get_profile
+
+TRIAL_STARTED_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("✨ Manage Premium Features", callback_data="premium_menu")]
+])
+
+
+async def _answer_with_error(callback_query: CallbackQuery, error_text: str) -> None:
+    """Answer the callback query and show the error message in parallel"""
+    await asyncio.gather(
+        callback_query.answer(),
+        send_error_message(callback_query.message, error_text)
+    )
 
 
 @check_user_ban
@@ -22,7 +35,7 @@ async def handle_premium_menu_button(client: Client, callback_query: CallbackQue
     """Handles the main premium menu button or the /premium command"""
     user_id = callback_query.from_user.id
     
-    status, text, markup = await get_premium_display_info(user_id)
+    status, text, markup = await get_premium_display_info(user_id, get_profile(callback_query))
     
     if status is None:
         # Error occurred
@@ -43,31 +56,20 @@ async def handle_premium_menu_button(client: Client, callback_query: CallbackQue
 @handle_errors(messages.ERROR_PLAN_SELECTION)
 async def handle_plan_selection(client: Client, callback_query: CallbackQuery) -> None:
     """Handle plan selection callback and show duration options"""
-    await callback_query.answer()
     user_id = callback_query.from_user.id
     
-    # Extract plan level: select_plan_{level}
-    _, _, level_str = callback_query.data.partition("_plan_")
-    try:
-         channels = int(level_str)
-    except ValueError:
-         logger.error(f"Invalid level in plan selection callback: {callback_query.data}")
-         await send_error_message(callback_query.message, messages.ERROR_PLAN_SELECTION)
-         return
+    # Plan level captured by the handler's regex filter: select_plan_{level}
+    channels = int(callback_query.matches[0].group(1))
          
     # Determine plan name
     plan_name = get_plan_name(channels)
         
     # --- Get monthly price from Config.PLANS ---
-    monthly_price = 0
-    for _, _, plan_channels, price in Config.PLANS:
-         if plan_channels == channels:
-              monthly_price = price
-              break
+    monthly_price = Config.PLAN_PRICE_BY_CHANNELS.get(channels, 0)
     
     if monthly_price <= 0:
          logger.error(f"Could not find valid price for plan with {channels} channels in Config.PLANS")
-         await send_error_message(callback_query.message, messages.ERROR_PLAN_SELECTION)
+         await _answer_with_error(callback_query, messages.ERROR_PLAN_SELECTION)
          return
     # --- End price lookup ---
     
@@ -78,16 +80,14 @@ async def handle_plan_selection(client: Client, callback_query: CallbackQuery) -
         monthly_price=monthly_price
     )
     
-    # Create duration buttons (Prices in Stars)
-    keyboard = InlineKeyboardMarkup([
-        [InlineKeyboardButton(f"1 Month - {monthly_price} ⭐", callback_data=f"buy_premium_{channels}_1")],
-        [InlineKeyboardButton(f"3 Months - {monthly_price * 3} ⭐", callback_data=f"buy_premium_{channels}_3")],
-        [InlineKeyboardButton(f"6 Months - {monthly_price * 6} ⭐", callback_data=f"buy_premium_{channels}_6")],
-        [InlineKeyboardButton(f"12 Months - {monthly_price * 12} ⭐", callback_data=f"buy_premium_{channels}_12")],
-        [InlineKeyboardButton(messages.BUTTON_BACK_TO_PLANS, callback_data="premium_menu")]
-    ])
+    # Reuse the prebuilt duration buttons for this plan
+    keyboard = DURATION_KEYBOARDS[channels]
     
-    await callback_query.message.edit_text(duration_text, reply_markup=keyboard)
+    # Answer the callback and render the options in parallel
+    await asyncio.gather(
+        callback_query.answer(),
+        callback_query.message.edit_text(duration_text, reply_markup=keyboard)
+    )
     logger.info(f"[💲] Showed duration options for {plan_name} ({channels} channels) to user {user_id}")
 
 async def handle_upgrade_premium_button(client: Client, callback_query: CallbackQuery) -> None:
@@ -95,51 +95,41 @@ async def handle_upgrade_premium_button(client: Client, callback_query: Callback
     try:
         user_id = callback_query.from_user.id
 
-        premium_details = db.get_user_premium_details(user_id)
-        if premium_details is None:
-             await send_error_message(callback_query.message, messages.ERROR_PREMIUM_DATA)
-             return
-             
-        is_premium, current_expiry_iso, current_max_channels, is_trial = premium_details
+        profile = db.get_user_profile(user_id)
+        is_premium, current_expiry_ts, current_max_channels, is_trial = (
+            profile.is_premium, profile.expiry_ts, profile.max_channels, profile.is_trial
+        )
 
-        if not is_premium or not current_expiry_iso:
+        if not is_premium or not current_expiry_ts:
             await callback_query.answer("You are not currently a premium user.", show_alert=True)
             return
             
         # Block trial users from upgrading
         if is_trial:
-            await callback_query.message.edit_text(
-                messages.TRIAL_NO_UPGRADE,
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton(messages.BUTTON_BACK_TO_MENU, callback_data="premium_menu")]
-                ])
+            await asyncio.gather(
+                callback_query.answer(),
+                callback_query.message.edit_text(
+                    messages.TRIAL_NO_UPGRADE,
+                    reply_markup=BACK_TO_MENU_KEYBOARD
+                )
             )
-            await callback_query.answer()
             return
             
         # Get current plan name
         current_plan_name = get_plan_name(current_max_channels)
 
         # Check if already on max plan
-        max_plan_channels = max(plan[2] for plan in Config.PLANS) if Config.PLANS else 0 # Added check for empty PLANS
-        if current_max_channels >= max_plan_channels:
+        if current_max_channels >= Config.MAX_PLAN_CHANNELS:
             await callback_query.answer(messages.ERROR_ALREADY_MAX_PLAN, show_alert=True)
             return
             
-        # Format expiry date
-        try:
-             current_expiry_dt = datetime.fromisoformat(current_expiry_iso)
-             current_expiry_str = current_expiry_dt.strftime("%d-%m-%Y")
-        except ValueError:
-             logger.error(f"[❌] Invalid expiry date format in DB for user {user_id} during upgrade: {current_expiry_iso}")
-             await send_error_message(callback_query.message, messages.ERROR_PREMIUM_DATA)
-             return
-             
-        text = messages.upgrade_options_text(current_plan_name, current_max_channels, current_expiry_str)
+        text = messages.upgrade_options_text(current_plan_name, current_max_channels, profile.expiry_display)
         markup = create_upgrade_plans_keyboard(current_max_channels)
         
-        await callback_query.message.edit_text(text, reply_markup=markup)
-        await callback_query.answer()
+        await asyncio.gather(
+            callback_query.answer(),
+            callback_query.message.edit_text(text, reply_markup=markup)
+        )
 
     except Exception as e:
         logger.error(f"[❌] Error handling upgrade premium button: {e}")
@@ -148,46 +138,43 @@ async def handle_upgrade_premium_button(client: Client, callback_query: Callback
 async def handle_upgrade_plan_selection(client: Client, callback_query: CallbackQuery) -> None:
     """Handle the selection of a new plan during upgrade (Show confirmation)"""
     try:
-        await callback_query.answer()
         user_id = callback_query.from_user.id
         
-        # Extract target plan level: upgrade_plan_{level}
-        _, _, level_str = callback_query.data.partition("_plan_")
-        try:
-             new_channels = int(level_str)
-        except ValueError:
-             logger.error(f"Invalid level in upgrade plan selection callback: {callback_query.data}")
-             await send_error_message(callback_query.message, messages.ERROR_UPGRADE)
-             return
+        # Target plan level captured by the handler's regex filter: upgrade_plan_{level}
+        new_channels = int(callback_query.matches[0].group(1))
 
-        current_channels = db.get_max_channels(user_id)
+        profile = db.get_user_profile(user_id)
+        current_channels = profile.max_channels
         
         if new_channels <= current_channels:
-            await send_error_message(callback_query.message, "You can only upgrade to a higher plan.") # Specific message
+            await _answer_with_error(callback_query, "You can only upgrade to a higher plan.") # Specific message
             return
 
         # Determine plan names 
         new_plan_name = get_plan_name(new_channels)
         
         # --- Get prices from Config.PLANS ---
-        current_monthly_price = next((price for _, _, ch, price in Config.PLANS if ch == current_channels), 0)
-        new_monthly_price = next((price for _, _, ch, price in Config.PLANS if ch == new_channels), 0)
+        current_monthly_price = Config.PLAN_PRICE_BY_CHANNELS.get(current_channels, 0)
+        new_monthly_price = Config.PLAN_PRICE_BY_CHANNELS.get(new_channels, 0)
 
         if current_monthly_price <= 0 or new_monthly_price <= 0:
              logger.error(f"Could not find valid prices for upgrade calculation ({current_channels} -> {new_channels})")
-             await send_error_message(callback_query.message, messages.ERROR_UPGRADE)
+             await _answer_with_error(callback_query, messages.ERROR_UPGRADE)
              return
         # --- End price lookup ---
 
         # --- Upgrade Cost Calculation --- 
         # Get current subscription expiry
-        current_expiry_iso = db.get_user_premium_details(user_id)[1]
-        current_expiry_dt = datetime.fromisoformat(current_expiry_iso)
-        remaining_days = (current_expiry_dt - datetime.now()).days
+        if not profile.expiry_ts:
+            logger.error(f"No active subscription expiry for upgrade calculation for user {user_id}")
+            await _answer_with_error(callback_query, messages.ERROR_UPGRADE)
+            return
+        now_ts = int(time.time())
+        remaining_days = (profile.expiry_ts - now_ts) // 86400
         
         if remaining_days <= 0:
             logger.error(f"Invalid remaining days for upgrade calculation: {remaining_days}")
-            await send_error_message(callback_query.message, messages.ERROR_UPGRADE)
+            await _answer_with_error(callback_query, messages.ERROR_UPGRADE)
             return
             
         # Calculate daily prices for both plans
@@ -203,7 +190,7 @@ async def handle_upgrade_plan_selection(client: Client, callback_query: Callback
         
         if upgrade_cost_stars <= 0:
             logger.error(f"Calculated non-positive upgrade cost for user {user_id} from {current_channels} to {new_channels}")
-            await send_error_message(callback_query.message, messages.ERROR_UPGRADE)
+            await _answer_with_error(callback_query, messages.ERROR_UPGRADE)
             return
         # ---------------------------------
 
@@ -215,25 +202,26 @@ async def handle_upgrade_plan_selection(client: Client, callback_query: Callback
         ) 
         
         # 1. Create the full payload with all necessary info
-        upgrade_payload = f"upgrade_{user_id}_from_{current_channels}_to_{new_channels}_cost_{upgrade_cost_stars}_time_{int(datetime.now().timestamp())}"
+        upgrade_payload = f"upgrade_{user_id}_from_{current_channels}_to_{new_channels}_cost_{upgrade_cost_stars}_time_{now_ts}"
         
         # 2. Generate a short unique ID
-        unique_upgrade_id = str(uuid.uuid4())[:8] # Use first 8 chars of UUID for brevity
+        unique_upgrade_id = secrets.token_hex(4) # 8 random hex chars, matches the confirm_upgrade callback regex
         
         # 3. Store the full payload in State, keyed by the unique ID
-        if not hasattr(State, 'pending_upgrades'):
-             State.pending_upgrades = {} # Initialize if it doesn't exist
-        State.pending_upgrades[unique_upgrade_id] = upgrade_payload
+        State.add_pending_upgrade(unique_upgrade_id, upgrade_payload)
         logger.info(f"[🔒] Stored pending upgrade payload for user {user_id} with ID: {unique_upgrade_id}")
         
         # 4. Use only the unique ID in the callback data
         keyboard = InlineKeyboardMarkup([
             # Callback leads to handle_confirm_upgrade in invoice_handlers.py
             [InlineKeyboardButton(messages.BUTTON_CONFIRM_UPGRADE, callback_data=f"confirm_upgrade_{unique_upgrade_id}")],
-            [InlineKeyboardButton(messages.BUTTON_BACK_TO_MENU, callback_data="premium_menu")] 
+            [BACK_TO_MENU_BUTTON]
         ])
         
-        await callback_query.message.edit_text(confirm_text, reply_markup=keyboard)
+        await asyncio.gather(
+            callback_query.answer(),
+            callback_query.message.edit_text(confirm_text, reply_markup=keyboard)
+        )
         logger.info(f"[⬆️] Showed upgrade confirmation ({current_channels} -> {new_channels}) to user {user_id}, Cost: {upgrade_cost_stars} ⭐, Pending ID: {unique_upgrade_id}")
 
     except Exception as e:
@@ -259,9 +247,7 @@ async def handle_start_trial(client: Client, callback_query: CallbackQuery) -> N
         if db.start_trial(user_id):
             await callback_query.message.edit_text(
                 messages.TRIAL_STARTED_SUCCESS,
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("✨ Manage Premium Features", callback_data="premium_menu")]
-                ])
+                reply_markup=TRIAL_STARTED_KEYBOARD
             )
             logger.info(f"[🆓] Successfully started 7-day trial for user {user_id}")
         else:
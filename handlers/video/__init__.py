@@ -9,9 +9,11 @@ This package provides handlers for initiating video processing:
 from pyrogram import Client, filters
 from pyrogram.handlers import MessageHandler
 from config.config import Config
+from utils.db import db
+from utils.cleanup import register_queue_processors
 
 from .private import process_video_handler
-from .channel import channel_video_handler
+from .channel import channel_video_handler, process_channel_video
 
 # Define what handlers are publicly exported from this package
 __all__ = [
@@ -19,8 +21,18 @@ __all__ = [
     "channel_video_handler",         # Handles new videos in channels
 ]
 
+async def _active_channel_check(_, __, message) -> bool:
+    # Async so pyrogram evaluates it on the event loop instead of its executor threads
+    return bool(message.chat) and db.is_channel_active(message.chat.id)
+
+# Only dispatch channel videos from channels activated by a premium user
+active_channel_filter = filters.create(_active_channel_check, "ActiveChannelFilter")
+
 def register_video_handlers(client: Client):
     """Registers all video-related handlers"""
+    # 0. Let the cleanup module resume queued videos without importing the handlers
+    register_queue_processors(process_video_handler, process_channel_video)
+
     # 1. Private video handler
     client.add_handler(
         MessageHandler(
@@ -34,7 +46,7 @@ def register_video_handlers(client: Client):
     client.add_handler(
         MessageHandler(
             channel_video_handler,
-            filters=filters.channel & filters.video & ~filters.chat(Config.DESTINATION_CHANNEL) # Exclude destination channel
+            filters=filters.channel & filters.video & ~filters.chat(Config.DESTINATION_CHANNEL) & active_channel_filter # Exclude destination channel, skip inactive channels
         ),
         group=3
     )
@@ -5,50 +5,31 @@ This module handles videos sent by users in private chats.
 """
 
 from pyrogram import Client
+from pyrogram.errors import RPCError
 from pyrogram.types import Message, ReplyKeyboardRemove
 from utils.logger import logger
 from utils.video_utils import calculate_processing_time
 from config.state import State
 from config.config import Config
 from utils.db import db
-from utils.cleanup import cleanup_and_process_next
+from utils.cleanup import clean_up_tracking_info
+from utils.admin_reports import queue_admin_report
 from utils.queue_manager import (
-    increment_active_videos,
-    get_active_videos_count,
-    add_to_queue
+    increment_active_videos_user,
+    get_active_videos_count_user,
+    add_to_queue_user
 )
 
-from utils.video_utils import (
-    check_video_size,
-    check_video_codec_format
-)
+from utils.video_utils import check_video_codec_format
 from utils.video_processor import (
     schedule_video_to_destination,
     track_video_progress,
-    send_original_video,
-    send_alternative_videos,
+    send_processed_videos,
     forward_to_transfer_channel
 )
 from utils.video_utils import format_video_info
 from config import messages
 
-async def check_video_requirements(message: Message, status_message: Message) -> tuple[bool, Message]:
-    """Checks if the video meets all requirements for private chats"""
-    user_id = message.from_user.id
-    
-    # Check if queue is full
-    if len(State.video_info) >= Config.MAX_QUEUED_VIDEOS:
-        logger.info(f"[⚠️] Video queue is full. Current size: {len(State.video_info)}")
-        await status_message.edit_text(messages.SYSTEM_BUSY)
-        return False, status_message
-    
-    # Check video size
-    if not await check_video_size(message.video, f"from user {user_id}"):
-        await status_message.edit_text(messages.VIDEO_TOO_LARGE(Config.MAX_VIDEO_SIZE_GB))
-        return False, status_message
-    
-    return True, status_message
-
 async def check_video_format(message: Message, status_message: Message) -> tuple[bool, Message]:
     """Checks if the video format and codec are supported"""
     user_id = message.from_user.id
@@ -83,80 +64,105 @@ async def process_video_handler(client: Client, message: Message) -> None:
     try:
         user_name = message.from_user.first_name
         
-        # Check if user is banned
-        is_banned, ban_reason = db.is_user_banned(user_id)
-        if is_banned:
-            logger.warning(f"[🚫] Banned user {user_id} ({user_name}) attempted to send video")
-            await State.bot.send_message(
-                chat_id=message.chat.id,
-                text=messages.USER_BANNED(ban_reason),
-                reply_markup=ReplyKeyboardRemove()
-            )
-            return
+        # Fetch ban, channel and premium status in one lookup
+        profile = db.get_user_profile(user_id)
         
-        # Check if user has configured a channel
-        if not db.has_user_channel(user_id):
-            logger.info(f"[📺] User {user_id} ({user_name}) needs to set up channel first")
-            await State.bot.send_message(
-                chat_id=message.chat.id,
-                text=messages.CHANNEL_SETUP_REQUIRED,
-                reply_markup=ReplyKeyboardRemove()
-            )
-            return
+        try:
+            # Check if user is banned
+            if profile.is_banned:
+                logger.warning(f"[🚫] Banned user {user_id} ({user_name}) attempted to send video")
+                await State.bot.send_message(
+                    chat_id=message.chat.id,
+                    text=messages.USER_BANNED(profile.ban_reason),
+                    reply_markup=ReplyKeyboardRemove()
+                )
+                return
         
-        if user_id in State.active_users:
-            user_has_active_entry = any(
-                isinstance(uid, int) and uid == user_id and tid in State.video_info
-                for tid, uid in State.user_videos.items()
-            )
-            if not user_has_active_entry:
-                logger.warning(f"[🧹] User {user_id} was in active_users but had no corresponding entry in user_videos/video_info. Cleaning up stale entry.")
-                State.active_users.discard(user_id)
+            # Check if user has configured a channel
+            if not profile.has_channel:
+                logger.info(f"[📺] User {user_id} ({user_name}) needs to set up channel first")
+                await State.bot.send_message(
+                    chat_id=message.chat.id,
+                    text=messages.CHANNEL_SETUP_REQUIRED,
+                    reply_markup=ReplyKeyboardRemove()
+                )
+                return
         
-        # Send immediate acknowledgment message
-        logger.info(f"[🔍] Creating status message for user {user_id}")
-        status_message = await message.reply_text(messages.VIDEO_RECEIVED)
-        logger.info(f"[✅] Status message created: ID={status_message.id}, Chat={status_message.chat.id}")
+            if user_id in State.active_users:
+                if not State.user_to_transfer_ids.get(user_id):
+                    logger.warning(f"[🧹] User {user_id} was in active_users but had no corresponding entry in video_info. Cleaning up stale entry.")
+                    State.active_users.discard(user_id)
         
-        # Initialize database for premium check
-        is_premium = db.is_user_premium(user_id)
+            # Reject oversized videos before paying for the status message round-trip
+            if message.video.file_size and message.video.file_size > Config.max_video_size_bytes():
+                logger.info(f"[❌] Video from user {user_id} ({user_name}) is too large ({message.video.file_size} bytes). Rejecting.")
+                await message.reply_text(messages.VIDEO_TOO_LARGE(Config.MAX_VIDEO_SIZE_GB))
+                return
+        
+            # Check if queue is full before sending any acknowledgment
+            if State.is_queue_full():
+                logger.info(f"[⚠️] Video queue is full. Current size: {len(State.video_info)}")
+                await message.reply_text(messages.SYSTEM_BUSY)
+                return
+        
+            # Send immediate acknowledgment message
+            logger.info(f"[🔍] Creating status message for user {user_id}")
+            status_message = await message.reply_text(messages.VIDEO_RECEIVED)
+            logger.info(f"[✅] Status message created: ID={status_message.id}, Chat={status_message.chat.id}")
         
-        # Check active videos count using the new State method
-        active_videos_count = get_active_videos_count(user_id, is_channel=False)
+            is_premium = profile.is_premium
         
-        # Check if user already has maximum allowed videos in processing
-        max_concurrent_videos = Config.MAX_CONCURRENT_VIDEOS_PREMIUM if is_premium else Config.MAX_CONCURRENT_VIDEOS_REGULAR
-        if active_videos_count >= max_concurrent_videos:
-            logger.info(f"[⚠️] User {user_id} ({user_name}) already has {active_videos_count} active videos in processing (max: {max_concurrent_videos})")
+            # Check active videos count using the new State method
+            active_videos_count = get_active_videos_count_user(user_id)
+        
+            # Check if user already has maximum allowed videos in processing
+            max_concurrent_videos = Config.MAX_CONCURRENT_VIDEOS_PREMIUM if is_premium else Config.MAX_CONCURRENT_VIDEOS_REGULAR
+            if active_videos_count >= max_concurrent_videos:
+                logger.info(f"[⚠️] User {user_id} ({user_name}) already has {active_videos_count} active videos in processing (max: {max_concurrent_videos})")
             
-            # Add to queue FIRST, then get position
-            add_to_queue(message, user_id, is_channel=False)
-            queued_position = len(State.user_video_queue[user_id])
+                # Add to queue FIRST, then get position
+                queued_position = add_to_queue_user(message, user_id)
             
-            await status_message.edit_text(
-                messages.QUEUE_LIMIT_REACHED(queued_position, is_premium, Config.MAX_CONCURRENT_VIDEOS_PREMIUM)
-            ) 
+                await status_message.edit_text(
+                    messages.QUEUE_LIMIT_REACHED(queued_position, is_premium, Config.MAX_CONCURRENT_VIDEOS_PREMIUM)
+                ) 
+                return
+        except RPCError as e:
+            # Nothing has been marked active yet, so there is no state to release
+            logger.error(f"[❌] Telegram error while checking video from user {user_id}: {e}")
+            return
+        except Exception as e:
+            # Unexpected failure (e.g. transport errors); still nothing to release, but tell the user
+            logger.error(f"[❌] Unexpected error while checking video from user {user_id}: {e}", exc_info=True)
+            try:
+                await State.bot.send_message(
+                    chat_id=message.chat.id,
+                    text=messages.CRITICAL_PROCESS_ERROR,
+                    reply_markup=ReplyKeyboardRemove()
+                )
+            except Exception as nested_e:
+                logger.error(f"[❌] Error sending critical error message: {nested_e}")
             return
             
         # If all checks passed, mark as active and increment counter
         State.active_users.add(user_id)
-        increment_active_videos(user_id, is_channel=False)
+        increment_active_videos_user(user_id)
         
+        transfer_msg_id = None
         try:
             # Forward to transfer channel
             logger.info(f"[📩] Received video from user {user_id} ({user_name})")
             transfer_msg = await forward_to_transfer_channel(message)
             if not transfer_msg:
                 await status_message.edit_text(messages.FAILED_INITIATE_PROCESS)
-                await cleanup_and_process_next(user_id, is_channel=False)
+                clean_up_tracking_info(None, user_id)
                 return
             transfer_msg_id = transfer_msg.id
             
             if transfer_msg.video and transfer_msg.video.alternative_videos:
                 logger.info(f"[⚡️] Video (Transfer ID: {transfer_msg_id}) was instantly processed by Telegram (found alternative_videos). Sending results directly.")
                 try:
-                    sent_original = await send_original_video(transfer_msg, user_id)
-                    sent_alternatives = await send_alternative_videos(transfer_msg, user_id)
+                    sent_original, sent_alternatives = await send_processed_videos(transfer_msg, user_id)
                     logger.info(f"[ℹ️] User {user_id} (Instant): Sent {sent_alternatives} alternative videos and original: {sent_original}")
 
                     # Send Admin Report
@@ -172,37 +178,30 @@ async def process_video_handler(client: Client, message: Message) -> None:
                         admin_report = (f"⚡️ Video Instantly Processed\n\n"
                                         f"👤 User ID: {user_id}\n"
                                         f"{status_text}")
-                        await State.bot.send_message(Config.ADMIN_ID, admin_report)
-                        logger.info(f"[✅] Sent instant processing report to admin for Transfer ID: {transfer_msg_id}")
+                        queue_admin_report(admin_report)
+                        logger.info(f"[✅] Queued instant processing report to admin for Transfer ID: {transfer_msg_id}")
                     except Exception as report_err:
                         logger.error(f"[❌] Error sending admin report for instant video {transfer_msg_id}: {report_err}")
 
                 except Exception as send_err:
                      logger.error(f"[❌] Error sending instantly processed videos for Transfer ID {transfer_msg_id} to user {user_id}: {send_err}")
                 finally:
-                    # Cleanup state for this user and exit
-                    await cleanup_and_process_next(user_id, is_channel=False)
+                    # Never tracked, so only the active slot needs releasing
+                    clean_up_tracking_info(None, user_id)
                     return
             
-            # Check if video meets requirements before proceeding
-            is_valid, status_message = await check_video_requirements(message, status_message)
-            if not is_valid:
-                # Cleanup state since requirements check failed
-                await cleanup_and_process_next(user_id, is_channel=False)
-                return
-                
-            # Check format AFTER requirements
+            # Check format only for videos Telegram did not process instantly
             is_valid, status_message = await check_video_format(message, status_message)
             if not is_valid:
-                # Cleanup state since format check failed
-                await cleanup_and_process_next(user_id, is_channel=False)
+                # Cleanup state since format check failed (the video was never tracked)
+                clean_up_tracking_info(None, user_id)
                 return
             
             # Schedule to destination channel
             scheduled_msg_id = await schedule_video_to_destination(transfer_msg_id)
             if not scheduled_msg_id:
                 await status_message.edit_text(messages.FAILED_SCHEDULE_PROCESS)
-                await cleanup_and_process_next(user_id, is_channel=False)
+                clean_up_tracking_info(None, user_id)
                 return
                 
             # Update message with processing info
@@ -221,46 +220,17 @@ async def process_video_handler(client: Client, message: Message) -> None:
             logger.info(f"[✅] Video from user {user_id} forwarded. Transfer ID: {transfer_msg_id}, Scheduled ID: {scheduled_msg_id}")
             
         except Exception as e:
-            logger.error(f"[❌] Error processing video from user {user_id}: {e}")
-            await status_message.edit_text(messages.INTERNAL_PROCESS_ERROR)
-            await cleanup_and_process_next(user_id, is_channel=False)
+            # The video is marked active here, so any failure must release its slot
+            logger.error(f"[❌] Error processing video from user {user_id}: {e}", exc_info=True)
+            try:
+                await status_message.edit_text(messages.INTERNAL_PROCESS_ERROR)
+            except Exception as edit_err:
+                logger.error(f"[❌] Error sending processing error message: {edit_err}")
+            finally:
+                # Only pass the transfer ID if the failure happened after tracking started
+                clean_up_tracking_info(transfer_msg_id if transfer_msg_id in State.video_info else None, user_id)
             return
-            
-    except Exception as e:
-        # General error handler for the entire process
-        user_id = message.from_user.id if message.from_user else "unknown"
-        logger.error(f"[❌] Top-level error processing video from user {user_id}: {e}", exc_info=True)
-        try:
-            # Use the status_message if available, otherwise reply to original message
-            msg_to_reply = status_message if 'status_message' in locals() else message
-            await State.bot.send_message(
-                chat_id=msg_to_reply.chat.id,
-                text=messages.CRITICAL_PROCESS_ERROR,
-                reply_markup=ReplyKeyboardRemove()
-            )
-        except Exception as nested_e:
-            logger.error(f"[❌] Error sending critical error message: {nested_e}")
-        finally:
-            # Ensure user is removed from active set and decrement counter in case of any error
-            if message.from_user:
-                await cleanup_and_process_next(message.from_user.id, is_channel=False)
-            # Attempt cleanup if tracking might have started
-            if 'transfer_msg_id' in locals() and 'user_id' in locals() and transfer_msg_id and user_id:
-                from utils.cleanup import clean_up_tracking_info
-                try:
-                    # Need to pass user_id for cleanup in this case
-                    clean_up_tracking_info(transfer_msg_id, user_id) 
-                except Exception as cleanup_error:
-                    logger.error(f"[❌] Error during final cleanup attempt: {cleanup_error}")
     finally:
         # Always remove message from processing set
         State.processing_messages.discard(message_id)
         logger.debug(f"[🧹] Removed message {message_id} from processing set")
-
-def remove_user_from_active_if_no_videos(user_id: int):
-    """Removes user from State.active_users only if they have no active videos left."""
-    if not any(
-        isinstance(uid, int) and uid == user_id and tid in State.video_info
-        for tid, uid in State.user_videos.items()
-    ):
-        State.active_users.discard(user_id) 
\ No newline at end of file
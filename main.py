@@ -3,10 +3,13 @@ Main module for the Telegram Video Quality Bot.
 """
 
 import asyncio
+import importlib.util
 import signal
+from pathlib import Path
 from pyrogram import Client, compose
 from utils.logger import logger
-from utils.cleanup import run_periodic_cleanup_task, cleanup_scheduled_messages
+from utils.cleanup import cleanup_scheduled_messages, stop_polling
+from utils.admin_reports import flush_pending_admin_reports
 from utils.db import db
 from config.state import State
 from config.config import Config
@@ -16,24 +19,33 @@ from handlers.commands import register_command_handlers
 from handlers.payment import register_payment_handlers
 from handlers.video import register_video_handlers
 
+# Pyrogram resolves session names against the main script's directory
+SESSIONS_DIR = Path(__file__).resolve().parent / "sessions"
 
-def signal_handler(signum, frame) -> None:
-    """Handles termination signals (SIGINT, SIGTERM)"""
+
+def request_shutdown(signum: int, main_task: asyncio.Task) -> None:
+    """Handles termination signals (SIGINT, SIGTERM) by cancelling the main task.
+       Runs on the event loop, so main() unwinds through its shutdown sequence.
+    """
     logger.info(f"Received signal {signum}, initiating graceful shutdown...")
-    # Request the main event loop to stop
-    if State.main_event_loop and State.main_event_loop.is_running():
-        State.main_event_loop.stop()
-    else:
-         logger.warning("Main event loop not found or not running during signal handling.")
+    if not main_task.done():
+        main_task.cancel()
+
+def install_signal_handlers(loop: asyncio.AbstractEventLoop, main_task: asyncio.Task) -> None:
+    """Registers loop-level handlers for SIGINT and SIGTERM"""
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, request_shutdown, signum, main_task)
+        except NotImplementedError:
+            # add_signal_handler is not available on Windows event loops
+            logger.warning(f"Cannot install loop signal handler for signal {signum} on this platform.")
 
 async def init_clients() -> list:
     """Initialize the Pyrogram bot and userbot clients"""
     try:
         # Ensure sessions directory exists
-        import os
-        sessions_dir = "sessions"
-        os.makedirs(sessions_dir, exist_ok=True)
-        logger.info(f"[📁] Sessions directory ensured at: {os.path.abspath(sessions_dir)}")
+        SESSIONS_DIR.mkdir(exist_ok=True)
+        logger.info(f"[📁] Sessions directory ensured at: {SESSIONS_DIR}")
         
         # Create bot client
         bot = Client(
@@ -78,11 +90,9 @@ async def register_all_handlers() -> None:
     # Mark handlers as registered
     State._handlers_registered = True
     
-    # Log number of registered handlers per group
-    for group_id in [1, 2, 3, 4]:
-        if group_id in State.bot.dispatcher.groups:
-            count = len(State.bot.dispatcher.groups[group_id])
-            logger.info(f"[📊] Group {group_id}: {count} handlers registered")
+    # Log number of registered handlers per group in one line
+    handler_counts = {group_id: len(handlers) for group_id, handlers in State.bot.dispatcher.groups.items()}
+    logger.info(f"[📊] Handlers registered per group: {handler_counts}")
     
     logger.info("[✅] All handlers registered successfully.")
 
@@ -104,9 +114,11 @@ async def cleanup_db() -> None:
 
 async def main() -> None:
     """Main async function that sets up and runs the bot."""
-    # Get the current event loop and store it for the signal handler
+    # Get the current event loop and store it in State
     State.main_event_loop = asyncio.get_running_loop()
+    install_signal_handlers(State.main_event_loop, asyncio.current_task())
     
+    clients = []
     try:
         # Initialize clients (bot and userbot)
         clients = await init_clients()
@@ -114,45 +126,74 @@ async def main() -> None:
         # Register handlers on the bot client
         await register_all_handlers()
         
-        # Start background tasks
-        db_cleanup_task = asyncio.create_task(cleanup_db())
-        tracking_cleanup_task = asyncio.create_task(run_periodic_cleanup_task())
-        logger.info("Background tasks started.")
-        
-        # Run both clients using compose
-        await compose(clients)
-        
-        logger.info("Clients stopped, preparing for shutdown...")
-        
-        # Cancel background tasks upon stopping
-        logger.info("Cancelling background tasks...")
-        db_cleanup_task.cancel()
-        tracking_cleanup_task.cancel()
-        await asyncio.gather(db_cleanup_task, tracking_cleanup_task, return_exceptions=True)
-        logger.info("Background tasks cancelled.")
+        # The task group cancels and awaits the background tasks if compose fails or main is cancelled
+        # Video status polling is armed on demand when the first video is tracked
+        async with asyncio.TaskGroup() as task_group:
+            db_cleanup_task = task_group.create_task(cleanup_db())
+            logger.info("Background tasks started.")
+            
+            # Run both clients using compose
+            await compose(clients)
+            
+            logger.info("Clients stopped, preparing for shutdown...")
+            db_cleanup_task.cancel()
     
-    except KeyboardInterrupt:
-        # Already handled by signal handler, just log
-        logger.info("KeyboardInterrupt received.")
+    except asyncio.CancelledError:
+        # Raised by request_shutdown on SIGINT/SIGTERM
+        logger.info("Shutdown requested by signal.")
     except Exception as e:
         logger.error(f"Critical error in main function: {e}", exc_info=True)
     finally:
         # Graceful shutdown sequence
         logger.info("Starting final cleanup and shutdown...")
         try:
-            # Perform any final synchronous cleanup if needed
+            # Cancel polling, queue processing and other fire-and-forget tasks still in flight
+            logger.info("Cancelling background tasks...")
+            stop_polling()
+            await State.cancel_background_tasks()
+            logger.info("Background tasks cancelled.")
+        except Exception as task_cancel_err:
+            logger.error(f"Error cancelling background tasks: {task_cancel_err}")
+        try:
+            # Send admin reports the cancelled batching task had not sent yet
+            await flush_pending_admin_reports()
+        except Exception as report_flush_err:
+            logger.error(f"Error flushing pending admin reports: {report_flush_err}")
+        try:
+            # Delete scheduled messages while the userbot may still be connected
             await cleanup_scheduled_messages()
         except Exception as final_cleanup_err:
             logger.error(f"Error during final synchronous cleanup: {final_cleanup_err}")
         
+        # Stop any client left running when compose was interrupted
+        for client in clients:
+            if client.is_connected:
+                try:
+                    await client.stop()
+                except Exception as stop_err:
+                    logger.warning(f"Error stopping client {client.name}: {stop_err}")
+        
         logger.info("[👋] Application shutdown complete.")
 
+def install_event_loop_policy() -> None:
+    """Run on uvloop's libuv-based event loop when it is installed, otherwise keep the default asyncio loop"""
+    try:
+        import uvloop
+    except ImportError:
+        logger.info("[ℹ️] uvloop not installed; using the default asyncio event loop")
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.info("[⚡️] Using uvloop event loop")
+
+def check_tgcrypto() -> None:
+    """Warn when TgCrypto is missing: Pyrogram then falls back to pure-Python MTProto encryption"""
+    if importlib.util.find_spec("tgcrypto") is None:
+        logger.warning("[⚠️] TgCrypto is not installed; Pyrogram will use slow pure-Python encryption. Install it with: pip install tgcrypto")
+
 if __name__ == "__main__":    
-    # Register signal handlers for graceful shutdown
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-    
-    # Run the main async function
+    install_event_loop_policy()
+    check_tgcrypto()
+    # Signal handlers are installed on the event loop inside main()
     try:
         asyncio.run(main())
     except Exception as e:
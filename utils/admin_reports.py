@@ -0,0 +1,95 @@
+"""
+Batched admin reports.
+
+Routine reports (processed videos, timeouts) are queued and sent to the admin
+combined into as few messages as possible, so bursts of finished videos don't
+run into Telegram's per-chat flood limits or hold up video cleanup.
+Critical error alerts are still sent immediately by notify_admin_critical_error.
+"""
+
+import asyncio
+from typing import List, Optional, Tuple
+from config.state import State
+from config.config import Config
+from utils.logger import logger
+
+# Telegram's maximum text message length
+MAX_MESSAGE_LENGTH = 4096
+REPORT_SEPARATOR = "\n\n---\n\n"
+
+# Background task draining State.admin_report_queue, started on the first report
+_flusher_task: Optional[asyncio.Task] = None
+
+
+def queue_admin_report(text: str) -> None:
+    """Queue a routine report for the admin; a background task sends queued reports in batches"""
+    global _flusher_task
+    State.admin_report_queue.put_nowait(text)
+    if _flusher_task is None or _flusher_task.done():
+        _flusher_task = State.add_background_task(_flush_admin_reports())
+
+
+def _join_reports(reports: List[str]) -> List[Tuple[str, int]]:
+    """Pack reports into as few messages as possible without exceeding MAX_MESSAGE_LENGTH.
+    Returns (message text, number of reports it contains) pairs."""
+    batches = []
+    current = ""
+    count = 0
+    for report in reports:
+        report = report[:MAX_MESSAGE_LENGTH]
+        candidate = f"{current}{REPORT_SEPARATOR}{report}" if current else report
+        if len(candidate) > MAX_MESSAGE_LENGTH:
+            batches.append((current, count))
+            current, count = report, 1
+        else:
+            current, count = candidate, count + 1
+    if current:
+        batches.append((current, count))
+    return batches
+
+
+async def _send_reports(reports: List[str]) -> None:
+    """Send reports to the admin in as few messages as possible.
+    Reports are removed from the list as their message is attempted, so on cancellation
+    the list holds exactly the reports that were never tried."""
+    sent = failed = 0
+    for text, count in _join_reports(reports):
+        try:
+            await State.bot.send_message(Config.ADMIN_ID, text)
+            sent += count
+        except Exception as e:
+            failed += count
+            logger.error(f"[❌] Failed to send batched admin report: {e}")
+        del reports[:count]
+    if sent:
+        logger.info(f"[✅] Sent {sent} queued report(s) to admin")
+    if failed:
+        logger.warning(f"[⚠️] Dropped {failed} queued admin report(s) after send failures")
+
+
+async def _flush_admin_reports() -> None:
+    """Wait for reports, collect everything that arrives within ADMIN_REPORT_BATCH_DELAY and send it together"""
+    queue = State.admin_report_queue
+    while True:
+        reports = [await queue.get()]
+        try:
+            # Let the rest of a burst arrive before sending
+            await asyncio.sleep(Config.ADMIN_REPORT_BATCH_DELAY)
+            while not queue.empty():
+                reports.append(queue.get_nowait())
+            await _send_reports(reports)
+        except asyncio.CancelledError:
+            # Shutdown: hand unsent reports back so flush_pending_admin_reports can send them
+            for text in reports:
+                queue.put_nowait(text)
+            raise
+
+
+async def flush_pending_admin_reports() -> None:
+    """Send every report still queued; called at shutdown once background tasks are cancelled"""
+    queue = State.admin_report_queue
+    reports = []
+    while not queue.empty():
+        reports.append(queue.get_nowait())
+    if reports:
+        await _send_reports(reports)
@@ -2,14 +2,34 @@ from utils.logger import logger
 from config.state import State
 from config.config import Config
 import asyncio
-from datetime import datetime
+import time
 from utils.queue_manager import (
-    decrement_active_videos,
-    get_active_videos_count,
+    release_slot,
     has_queued_videos,
-    get_next_from_queue
+    get_next_from_queue,
+    get_active_videos_count,
+    get_queue_length
 )
 from utils.video_utils import is_userbot_connected
+from utils.db import db
+
+# Telegram accepts up to 100 message IDs per delete_messages request
+DELETE_BATCH_SIZE = 100
+
+# Video handlers used to process queued videos, set by register_queue_processors
+_queue_processors = {}
+
+# Running queue workers, at most one per entity: {(entity_id, is_channel): Task}
+_queue_workers: dict[tuple[int, bool], asyncio.Task] = {}
+
+# Pending poll timer; None while idle (nothing tracked) or while a cycle is running
+_poll_timer_handle: asyncio.TimerHandle | None = None
+
+# Held for the duration of a poll cycle so cycles never overlap
+_poll_lock = asyncio.Lock()
+
+# Bounds how many copy_message polls are in flight at once
+_poll_semaphore = asyncio.Semaphore(Config.POLL_CONCURRENCY)
 
 
 async def delete_scheduled_message(scheduled_msg_id: int) -> None:
@@ -29,15 +49,38 @@ async def delete_scheduled_message(scheduled_msg_id: int) -> None:
         # Catch specific errors if needed, e.g., MessageIdInvalid
         logger.error(f"[❌] Error deleting scheduled message {scheduled_msg_id}: {e}")
 
-def clean_up_tracking_info(transfer_msg_id: int, user_or_channel_data: int | tuple | None) -> None:
-    """Cleans up tracking information for a video (video_info, user_videos, active_users). 
-       Also attempts to clean the scheduled_to_transfer_map if possible.
-       Checks the queue for the next video to process.
+async def delete_scheduled_messages_bulk(scheduled_msg_ids: list[int]) -> None:
+    """Deletes many scheduled messages from the destination channel, one request per batch.
+       The caller must have checked that the userbot is connected.
     """
-    if not transfer_msg_id:
-        logger.warning("[⚠️] Attempted to clean up with invalid transfer_msg_id.")
+    if not scheduled_msg_ids:
         return
-        
+
+    batches = [
+        scheduled_msg_ids[i:i + DELETE_BATCH_SIZE]
+        for i in range(0, len(scheduled_msg_ids), DELETE_BATCH_SIZE)
+    ]
+    results = await asyncio.gather(
+        *(
+            State.userbot.delete_messages(
+                chat_id=Config.DESTINATION_CHANNEL,
+                message_ids=batch,
+                is_scheduled=True
+            )
+            for batch in batches
+        ),
+        return_exceptions=True
+    )
+    for batch, result in zip(batches, results):
+        if isinstance(result, Exception):
+            logger.error(f"[❌] Error deleting {len(batch)} scheduled messages ({batch[0]}..{batch[-1]}): {result}")
+        else:
+            logger.info(f"[🗑️] Deleted {len(batch)} scheduled messages ({batch[0]}..{batch[-1]})")
+
+def _release_tracking(transfer_msg_id: int | None, user_or_channel_data: int | tuple | None) -> tuple[int | None, bool]:
+    """Removes a video's tracking state and releases its active slot in one pass.
+       Returns (entity_id, is_channel) of the owner whose queue should advance, or (None, ...) if unknown.
+    """
     # Determine user_id for active_users cleanup
     user_id_for_cleanup = -1 # Default to channel/unknown
     is_channel = False
@@ -51,61 +94,136 @@ def clean_up_tracking_info(transfer_msg_id: int, user_or_channel_data: int | tup
         channel_id = user_or_channel_data[0]
     # If user_or_channel_data is None, user_id_for_cleanup remains -1
 
+    # Steps taken, summarized in a single INFO line at the end
+    removed_from = []
+    owner_status = "no owner"
+
     # 1. Remove from video_info (primary tracking)
     scheduled_msg_id = None
-    if transfer_msg_id in State.video_info:
-        _, scheduled_msg_id, _, _, _ = State.video_info.pop(transfer_msg_id)
-        logger.info(f"[🧹] Removed transfer ID {transfer_msg_id} from video_info.")
+    if transfer_msg_id is None:
+        pass # Video failed before it was tracked; only its active slot is released
+    elif (job := State.video_info.pop(transfer_msg_id, None)) is not None:
+        scheduled_msg_id = job.scheduled_msg_id
+        removed_from.append("video_info")
+
+        # 2. Remove from the user's reverse index
+        if not job.is_channel:
+            transfer_ids = State.user_to_transfer_ids.get(job.owner)
+            if transfer_ids is not None:
+                transfer_ids.discard(transfer_msg_id)
+                if not transfer_ids:
+                    del State.user_to_transfer_ids[job.owner]
+                removed_from.append("user_to_transfer_ids")
     else:
         logger.warning(f"[⚠️] Transfer ID {transfer_msg_id} not found in video_info during cleanup.")
-
-    # 2. Remove from user_videos (reverse map)
-    if transfer_msg_id in State.user_videos:
-        State.user_videos.pop(transfer_msg_id)
-        logger.info(f"[🧹] Removed transfer ID {transfer_msg_id} from user_videos.")
     
     # 3. Remove from active_users (only if it was a user video)
     if user_id_for_cleanup != -1 and not is_channel:
-        # Decrement active videos count for user
-        decrement_active_videos(user_id_for_cleanup, is_channel=False)
-        
-        # Only remove from active_users if there are no more active videos
-        remaining_count = get_active_videos_count(user_id_for_cleanup, is_channel=False)
-        if remaining_count == 0 and not has_queued_videos(user_id_for_cleanup, is_channel=False):
+        # Release the user's slot; drop them from active_users once nothing is active or queued
+        if release_slot(user_id_for_cleanup):
             State.active_users.discard(user_id_for_cleanup)
-            logger.info(f"[🧹] Discarded user ID {user_id_for_cleanup} from active_users (no more active or queued videos).")
+            removed_from.append("active_users")
+            owner_status = f"user {user_id_for_cleanup} is now idle"
         else:
-            logger.info(f"[🧹] Decremented active videos count for user {user_id_for_cleanup}. Remaining active: {remaining_count}")
+            owner_status = f"user {user_id_for_cleanup} still has active or queued videos"
     elif is_channel and channel_id:
-        # Decrement active videos count for channel
-        decrement_active_videos(channel_id, is_channel=True)
-        logger.info(f"[🧹] Decremented active videos count for channel {channel_id}.")
+        # Release the channel's slot
+        if release_slot(channel_id, is_channel=True):
+            owner_status = f"channel {channel_id} is now idle"
+        else:
+            owner_status = f"channel {channel_id} still has active or queued videos"
         
-    # 4. Attempt to clean up scheduled_to_transfer_map if we found the scheduled_msg_id
-    if scheduled_msg_id and scheduled_msg_id in State.scheduled_to_transfer_map:
-         # Double check if the mapping still points to the transfer_id we are cleaning
-         if State.scheduled_to_transfer_map[scheduled_msg_id] == transfer_msg_id:
-              try:
-                   del State.scheduled_to_transfer_map[scheduled_msg_id]
-                   logger.info(f"[🧹] Removed mapping for Scheduled ID: {scheduled_msg_id} from scheduled_to_transfer_map.")
-              except KeyError:
-                   pass
-         else:
-              logger.warning(f"[⚠️] Mismatch in scheduled_to_transfer_map cleanup: Scheduled ID {scheduled_msg_id} maps to a different Transfer ID than {transfer_msg_id}.")
-    elif scheduled_msg_id:
-         logger.warning(f"[⚠️] Scheduled ID {scheduled_msg_id} (from video_info) not found in scheduled_to_transfer_map during cleanup.")
-
-    logger.info(f"[🧹] Cleanup tracking complete for Transfer ID {transfer_msg_id}.")
-    
-    # 5. Process next video from queue if any
+    # 4. Remove the scheduled <-> transfer mapping (both directions)
+    if transfer_msg_id is not None:
+        unmapped_scheduled_id = State.unmap_transfer(transfer_msg_id)
+        if unmapped_scheduled_id is not None:
+            removed_from.append(f"scheduled map ({unmapped_scheduled_id})")
+        elif scheduled_msg_id:
+            logger.warning(f"[⚠️] Scheduled ID {scheduled_msg_id} (from video_info) not found in scheduled_to_transfer_map during cleanup.")
+
+    logger.info(f"[🧹] Cleanup tracking complete for Transfer ID {transfer_msg_id}: removed from {', '.join(removed_from) or 'nothing'}; {owner_status}.")
+
     entity_id = user_id_for_cleanup if not is_channel else channel_id
     if entity_id and entity_id != -1:
-        # Schedule task to process next video from queue
+        return entity_id, is_channel
+    return None, is_channel
+
+def clean_up_tracking_info(transfer_msg_id: int | None, user_or_channel_data: int | tuple | None) -> None:
+    """Cleans up tracking information for a video (video_info, user_to_transfer_ids, active_users). 
+       Also attempts to clean the scheduled_to_transfer_map if possible.
+       transfer_msg_id is None when the video failed before it was forwarded; only its active slot is released.
+       Starts a queue worker for the owner so the next queued video is processed.
+    """
+    entity_id, is_channel = _release_tracking(transfer_msg_id, user_or_channel_data)
+    
+    # Process next video from queue if any
+    if entity_id is not None and has_queued_videos(entity_id, is_channel):
         if State.main_event_loop:
-            State.main_event_loop.create_task(process_next_from_queue(entity_id, is_channel))
+            start_queue_worker(entity_id, is_channel)
         else:
             logger.warning(f"[⚠️] Cannot schedule next video from queue: main_event_loop not available")
 
+def clean_up_tracking_info_bulk(transfer_msg_ids: list[int]) -> None:
+    """Removes tracking information for many videos in one pass.
+       Unlike clean_up_tracking_info, it does not schedule the next queued video,
+       so it is meant for shutdown where nothing else will be processed.
+    """
+    for transfer_msg_id in transfer_msg_ids:
+        job = State.video_info.pop(transfer_msg_id, None)
+        State.unmap_transfer(transfer_msg_id)
+        owner = job.owner if job is not None else None
+
+        if isinstance(owner, int):
+            transfer_ids = State.user_to_transfer_ids.get(owner)
+            if transfer_ids is not None:
+                transfer_ids.discard(transfer_msg_id)
+                if not transfer_ids:
+                    del State.user_to_transfer_ids[owner]
+            if release_slot(owner):
+                State.active_users.discard(owner)
+        elif isinstance(owner, tuple):
+            release_slot(owner[0], is_channel=True)
+
+    logger.info(f"[🧹] Bulk cleanup removed tracking info for {len(transfer_msg_ids)} transfer IDs.")
+
+def register_queue_processors(private_handler, channel_handler) -> None:
+    """Registers the handlers that process queued videos.
+       Called once by handlers.video at registration time; those modules import this one,
+       so importing them here would be circular.
+    """
+    _queue_processors["private"] = private_handler
+    _queue_processors["channel"] = channel_handler
+
+def _has_free_slot(entity_id: int, is_channel: bool) -> bool:
+    """Check whether a user or channel is below its concurrent video limit"""
+    if is_channel:
+        max_concurrent_videos = Config.MAX_CONCURRENT_VIDEOS_CHANNEL
+    elif db.get_user_profile(entity_id).is_premium:
+        max_concurrent_videos = Config.MAX_CONCURRENT_VIDEOS_PREMIUM
+    else:
+        max_concurrent_videos = Config.MAX_CONCURRENT_VIDEOS_REGULAR
+    return get_active_videos_count(entity_id, is_channel) < max_concurrent_videos
+
+def start_queue_worker(entity_id: int, is_channel: bool = False) -> None:
+    """Starts a worker draining the entity's queue, unless one is already running."""
+    key = (entity_id, is_channel)
+    if key not in _queue_workers:
+        _queue_workers[key] = State.add_background_task(_queue_worker(entity_id, is_channel))
+
+async def _queue_worker(entity_id: int, is_channel: bool) -> None:
+    """Processes queued videos for one user or channel while it has free slots."""
+    try:
+        while _has_free_slot(entity_id, is_channel):
+            queued_before = get_queue_length(entity_id, is_channel)
+            if not queued_before:
+                break
+            await process_next_from_queue(entity_id, is_channel)
+            # The handler re-queues a video it cannot start; stop instead of spinning on it
+            if get_queue_length(entity_id, is_channel) >= queued_before:
+                break
+    finally:
+        _queue_workers.pop((entity_id, is_channel), None)
+
 async def process_next_from_queue(entity_id: int, is_channel: bool = False) -> None:
     """Process the next video from the queue for a user or channel."""
     next_video = get_next_from_queue(entity_id, is_channel)
@@ -118,11 +236,9 @@ async def process_next_from_queue(entity_id: int, is_channel: bool = False) -> N
     
     try:
         if is_channel:
-            from handlers.video.channel import process_channel_video
-            await process_channel_video(next_video)
+            await _queue_processors["channel"](next_video)
         else:
-            from handlers.video.private import process_video_handler
-            await process_video_handler(State.bot, next_video)
+            await _queue_processors["private"](State.bot, next_video)
     except Exception as e:
         logger.error(f"[❌] Error processing next video from queue for {'channel' if is_channel else 'user'} {entity_id}: {e}")
         # Send critical error notification for queue processing errors
@@ -153,14 +269,19 @@ async def cleanup_scheduled_messages() -> None:
     else:
         logger.warning("[⚠️] Userbot client missing; cannot delete scheduled messages during shutdown.")
     
-    # Create a copy to avoid modification during iteration (though cleanup removes items)
-    items_to_cleanup = list(State.video_info.items()) 
+    # Snapshot the tracked videos, then delete in batches and drop all tracking in one pass
+    items_to_cleanup = list(State.video_info.items())
+    scheduled_msg_ids = [job.scheduled_msg_id for _, job in items_to_cleanup if job.scheduled_msg_id]
     
-    for transfer_msg_id, (user_id, scheduled_msg_id, _, _, _) in items_to_cleanup:
-        # Attempt to delete the message
-        await delete_scheduled_message(scheduled_msg_id)
-        user_or_channel_data = State.user_videos.get(transfer_msg_id) 
-        clean_up_tracking_info(transfer_msg_id, user_or_channel_data)
+    # A successful start already proves the session works; otherwise check the connection once
+    userbot_ready = started_temp_userbot or (
+        State.userbot is not None and await is_userbot_connected(State.userbot)
+    )
+    if userbot_ready:
+        await delete_scheduled_messages_bulk(scheduled_msg_ids)
+    elif scheduled_msg_ids:
+        logger.warning(f"Userbot not available, cannot delete {len(scheduled_msg_ids)} scheduled messages")
+    clean_up_tracking_info_bulk([transfer_msg_id for transfer_msg_id, _ in items_to_cleanup])
     
     logger.info("[✅] Shutdown cleanup of scheduled messages completed.")
 
@@ -172,66 +293,126 @@ async def cleanup_scheduled_messages() -> None:
         except Exception as stop_err:
             logger.warning(f"[⚠️] Error stopping userbot after shutdown cleanup: {stop_err}")
 
-async def run_periodic_cleanup_task():
-    """Periodically checks for timed-out videos and polls scheduled videos by copying to Junk Channel."""
+async def _poll_tracked_video(transfer_msg_id: int, semaphore: asyncio.Semaphore, handle_processed_video) -> None:
+    """Polls one tracked video by copying it to the Junk Channel and handles it if alternatives are ready.
+       Errors propagate to the caller, which reports them for the whole poll cycle.
+    """
+    async with semaphore:
+        logger.debug(f"[🔄] Polling TID {transfer_msg_id}: Copying original msg {transfer_msg_id} from Transfer Channel {Config.TRANSFER_CHANNEL} to Junk Channel {Config.JUNK_CHANNEL}")
+        junk_msg = await State.bot.copy_message(
+            chat_id=Config.JUNK_CHANNEL,
+            from_chat_id=Config.TRANSFER_CHANNEL,
+            message_id=transfer_msg_id
+        )
+        logger.debug(f"[🗑️] Copied msg {transfer_msg_id} from Transfer Channel to Junk Channel. New msg ID: {junk_msg.id}")
+
+    # Check the Junk Message for alternatives
+    if junk_msg and junk_msg.video.alternative_videos:
+        # Make sure the state hasn't been cleaned up concurrently
+        if transfer_msg_id in State.video_info:
+            await handle_processed_video(transfer_msg_id, junk_msg) # Pass junk_msg
+        else:
+            logger.info(f"[ℹ️] Video {transfer_msg_id} was cleaned up before polling result could be processed.")
+
+def arm_polling(delay: float | None = None) -> None:
+    """Schedules the next poll cycle unless one is already pending or running.
+       Called whenever a video starts being tracked; an idle bot never wakes up to poll.
+    """
+    global _poll_timer_handle
+    if _poll_timer_handle is not None or _poll_lock.locked():
+        return
+    if not State.main_event_loop:
+        logger.warning("[⚠️] Cannot arm video polling: main_event_loop not available")
+        return
+    _poll_timer_handle = State.main_event_loop.call_later(
+        Config.CHECK_INTERVAL if delay is None else delay,
+        _start_poll_cycle
+    )
+
+def stop_polling() -> None:
+    """Cancels the pending poll cycle, if any (used during shutdown)."""
+    global _poll_timer_handle
+    if _poll_timer_handle is not None:
+        _poll_timer_handle.cancel()
+        _poll_timer_handle = None
+        logger.info("[⏰] Periodic video polling stopped.")
+
+def _start_poll_cycle() -> None:
+    """Timer callback: runs one poll cycle as a tracked background task."""
+    global _poll_timer_handle
+    _poll_timer_handle = None
+    State.add_background_task(_run_poll_cycle())
+
+async def _check_tracked_videos() -> None:
+    """Runs one poll cycle: handles timed-out videos and polls the rest by copying to Junk Channel."""
     # Import here to avoid circular dependency
-    from utils.video_processor import handle_processed_video
+    from utils.video_processor import handle_processed_video, handle_video_timeout
     
-    logger.info("Starting periodic video status check/polling task...")
-    while True:
-        try:
-            await asyncio.sleep(Config.CHECK_INTERVAL) 
-            
-            videos_to_check = list(State.video_info.items()) # Check a snapshot
-            
-            if not videos_to_check:
-                continue
-
-            logger.info(f"[⏰] Polling/Checking status for {len(videos_to_check)} tracked videos...")
-
-            for transfer_msg_id, (user_or_channel, scheduled_msg_id, timestamp, _, _) in videos_to_check:
-                # Ensure scheduled_msg_id is valid
-                if not scheduled_msg_id:
-                    logger.warning(f"[⚠️] Skipping check for TID {transfer_msg_id} due to missing scheduled_msg_id in tracking info.")
-                    continue
-                    
-                # 1. Check for Timeout
-                if await check_video_timeout(transfer_msg_id, user_or_channel, scheduled_msg_id, timestamp):
-                    continue
-
-                # 2. Poll by copying to Junk Channel (if not timed out)
-                junk_msg = None
-                try:
-                    logger.debug(f"[🔄] Polling TID {transfer_msg_id}: Copying original msg {transfer_msg_id} from Transfer Channel {Config.TRANSFER_CHANNEL} to Junk Channel {Config.JUNK_CHANNEL}")
-                    if State.bot:
-                        junk_msg = await State.bot.copy_message(
-                            chat_id=Config.JUNK_CHANNEL,
-                            from_chat_id=Config.TRANSFER_CHANNEL,
-                            message_id=transfer_msg_id
-                        )
-                        logger.debug(f"[🗑️] Copied msg {transfer_msg_id} from Transfer Channel to Junk Channel. New msg ID: {junk_msg.id}")
-                    else:
-                        logger.warning(f"[⚠️] Userbot not available for polling TID {transfer_msg_id}")
-                        continue # Skip polling if bot is down
-                        
-                except Exception as copy_err:
-                    logger.error(f"[❌] Error copying msg {transfer_msg_id} from Transfer Channel to junk channel for polling TID {transfer_msg_id}: {copy_err}")
-                    continue # Move to next video
-                
-                # 3. Check the Junk Message for alternatives
-                if junk_msg and junk_msg.video.alternative_videos:                    
-                    try:
-                         # Make sure the state hasn't been cleaned up concurrently
-                         if transfer_msg_id in State.video_info:
-                              await handle_processed_video(transfer_msg_id, junk_msg) # Pass junk_msg
-                         else:
-                              logger.info(f"[ℹ️] Video {transfer_msg_id} was cleaned up before polling result could be processed.")
-                    except Exception as handle_err:
-                         logger.error(f"[❌] Error calling handle_processed_video for TID {transfer_msg_id} after polling: {handle_err}")
+    # Snapshot only the keys; entries are re-read below since timeouts clean up concurrently
+    transfer_ids = tuple(State.video_info)
+
+    if not transfer_ids:
+        return
+
+    logger.info(f"[⏰] Polling/Checking status for {len(transfer_ids)} tracked videos...")
+
+    # Videos tracked before this cutoff have timed out
+    timeout_cutoff = time.monotonic() - Config.VIDEO_TIMEOUT
+    to_poll = []
+    for transfer_msg_id in transfer_ids:
+        job = State.video_info.get(transfer_msg_id)
+        if job is None:
+            continue # Cleaned up while an earlier timeout was being handled
+        user_or_channel, scheduled_msg_id, timestamp = job.user_id, job.scheduled_msg_id, job.timestamp
+    
+        # Ensure scheduled_msg_id is valid
+        if not scheduled_msg_id:
+            logger.warning(f"[⚠️] Skipping check for TID {transfer_msg_id} due to missing scheduled_msg_id in tracking info.")
+            continue
+        
+        # 1. Check for Timeout (cheap, done before any polling)
+        if timestamp < timeout_cutoff:
+            await handle_video_timeout(transfer_msg_id, user_or_channel, scheduled_msg_id, timestamp)
+            continue
+        to_poll.append(transfer_msg_id)
+
+    if not to_poll:
+        return
+    if not State.bot:
+        logger.warning(f"[⚠️] Bot not available for polling {len(to_poll)} tracked videos")
+        return # Skip polling if bot is down
+
+    # 2. Poll by copying to Junk Channel, up to POLL_CONCURRENCY at a time
+    results = await asyncio.gather(
+        *(
+            _poll_tracked_video(transfer_msg_id, _poll_semaphore, handle_processed_video)
+            for transfer_msg_id in to_poll
+        ),
+        return_exceptions=True
+    )
+    failures = [
+        f"{transfer_msg_id}: {result}"
+        for transfer_msg_id, result in zip(to_poll, results)
+        if isinstance(result, Exception)
+    ]
+    if failures:
+        logger.error(f"[❌] Polling failed for {len(failures)} of {len(to_poll)} tracked videos: " + "; ".join(failures))
 
+async def _run_poll_cycle() -> None:
+    """Runs a poll cycle unless one is already in progress.
+       Re-arms itself only while videos are still being tracked.
+    """
+    if _poll_lock.locked():
+        logger.warning("[⚠️] Previous poll cycle is still running. Skipping overlapping cycle.")
+        return
+    
+    retry_delay = None
+    async with _poll_lock:
+        try:
+            await _check_tracked_videos()
         except asyncio.CancelledError:
-            logger.info("[⏰] Periodic video polling task cancelled.")
-            break # Exit the loop if cancelled
+            logger.info("[⏰] Periodic video polling cycle cancelled.")
+            raise
         except Exception as e:
             logger.error(f"[❌] Error in periodic polling task: {e}", exc_info=True)
             # Send critical error notification to admin
@@ -239,30 +420,9 @@ async def run_periodic_cleanup_task():
                 from utils.video_processor import notify_admin_critical_error
                 await notify_admin_critical_error(str(e), "Periodic polling task error")
             except:
-                pass  # Don't let notification failure break the main loop
+                pass  # Don't let notification failure stop polling
             # Wait a bit longer before retrying after an error
-            await asyncio.sleep(Config.CHECK_INTERVAL * 2) 
-
-async def check_video_timeout(transfer_msg_id: int, user_id: int, scheduled_msg_id: int, timestamp) -> bool:
-    """Checks if a video has timed out and handles it if necessary"""
-    from utils.video_processor import safe_timestamp_to_datetime, handle_video_timeout
-    
-    current_time = datetime.now()
-    timestamp_dt = safe_timestamp_to_datetime(timestamp)
-    time_diff = (current_time - timestamp_dt).total_seconds()
+            retry_delay = Config.CHECK_INTERVAL * 2
     
-    if time_diff > Config.VIDEO_TIMEOUT:
-        await handle_video_timeout(transfer_msg_id, user_id, scheduled_msg_id, timestamp)
-        return True
-    return False 
-
-async def cleanup_and_process_next(entity_id: int, is_channel: bool = False):
-    """Decrement active videos, remove from active set if needed, and process next from queue."""
-    decrement_active_videos(entity_id, is_channel=is_channel)
-    if not is_channel:
-        # Remove user from active if no more active videos
-        # Import here to avoid circular import
-        from handlers.video.private import remove_user_from_active_if_no_videos
-        remove_user_from_active_if_no_videos(entity_id)
-    # Always process next from queue
-    await process_next_from_queue(entity_id, is_channel=is_channel) 
\ No newline at end of file
+    if State.video_info:
+        arm_polling(retry_delay)
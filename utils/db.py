@@ -1,15 +1,73 @@
 import sqlite3
 import os
+import time
 from datetime import datetime
 from utils.logger import logger
-from typing import List, Tuple, Optional, Dict, Any
+from typing import Iterable, List, Tuple, Optional, Dict, Any, NamedTuple
 from config.config import Config
 
+class UserProfile(NamedTuple):
+    """Snapshot of the user row fields needed by the request handlers"""
+    is_banned: bool
+    ban_reason: Optional[str]
+    channel_id: Optional[int]
+    is_premium: bool
+    expiry_ts: Optional[int]               # Unix timestamp of the premium/trial expiry
+    max_channels: int
+    is_trial: bool
+    expiry_display: Optional[str] = None   # expiry_ts formatted as dd-mm-YYYY
+
+    @property
+    def has_channel(self) -> bool:
+        return self.channel_id is not None
+
+DEFAULT_USER_PROFILE = UserProfile(False, None, None, False, None, 0, False)
+
+# Applied to every new connection. WAL lets reads proceed during writes, and
+# synchronous=NORMAL syncs at checkpoints instead of on every commit: the
+# database stays consistent, but the last commits may be lost on power loss.
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",   # ~20 MB page cache
+    "PRAGMA busy_timeout=5000",   # ms to wait on a locked database
+)
+
+# Size of sqlite3's per-connection prepared statement cache (keyed by SQL text)
+_CACHED_STATEMENTS = 256
+
+# Queries run on nearly every update or shared by several methods; kept as constants so each call reuses one cached statement
+_SQL_GET_USER_PROFILE = "SELECT is_banned, ban_reason, user_channel_id, is_premium, premium_expiry, max_channels, trial_end_date FROM users WHERE user_id = ?"
+_SQL_GET_USER_PREMIUM = "SELECT is_premium, premium_expiry, max_channels, trial_end_date FROM users WHERE user_id = ?"
+_SQL_IS_USER_PREMIUM = (
+    "SELECT 1 FROM users WHERE user_id = :user_id "
+    "AND ((is_premium = 1 AND premium_expiry > :now) OR trial_end_date > :now)"
+)
+_SQL_GET_CHANNEL_STATUS = (
+    "SELECT c.user_id, c.expiry_date, c.expiry_date > :now "
+    "AND ((u.is_premium = 1 AND u.premium_expiry > :now) OR u.trial_end_date > :now) "
+    "FROM channels c LEFT JOIN users u ON u.user_id = c.user_id WHERE c.channel_id = :channel_id"
+)
+
+# Expiry-related columns hold Unix seconds (INTEGER). Databases created before
+# that stored naive local-time ISO strings; _migrate_timestamps converts them.
+_TIMESTAMP_COLUMNS = (
+    ("users", "user_id", "premium_expiry"),
+    ("users", "user_id", "trial_end_date"),
+    ("channels", "channel_id", "added_date"),
+    ("channels", "channel_id", "expiry_date"),
+)
+
 class Database:
     """SQLite database manager for premium user functionality"""
     DB_FILE = Config.DATABASE_URL
     
     def __init__(self):
+        # In-process cache of user profiles: {user_id: (expires_at, UserProfile)}
+        self._profile_cache: Dict[int, Tuple[float, UserProfile]] = {}
+        # In-process cache of channel activation: {channel_id: (expires_at, is_active, owner_user_id)}
+        self._channel_active_cache: Dict[int, Tuple[float, bool, Optional[int]]] = {}
         try:
             # Ensure data directory exists - handle case where dirname is empty
             db_dir = os.path.dirname(self.DB_FILE)
@@ -17,8 +75,7 @@ class Database:
                 os.makedirs(db_dir, exist_ok=True)
             
             # Initialize database and create tables if they don't exist
-            self.conn = sqlite3.connect(self.DB_FILE)
-            self.cursor = self.conn.cursor()
+            self._connect()
             self._create_tables()
             
             logger.info(f"[✅] Database initialized successfully at {os.path.abspath(self.DB_FILE)}")
@@ -28,6 +85,13 @@ class Database:
             self.conn = None
             self.cursor = None
         
+    def _connect(self) -> None:
+        """Open the SQLite connection and apply the connection PRAGMAs"""
+        self.conn = sqlite3.connect(self.DB_FILE, cached_statements=_CACHED_STATEMENTS)
+        for pragma in _PRAGMAS:
+            self.conn.execute(pragma)
+        self.cursor = self.conn.cursor()
+
     def _create_tables(self):
         """Create necessary database tables if they don't exist"""
         try:
@@ -40,14 +104,14 @@ class Database:
             CREATE TABLE IF NOT EXISTS users (
                 user_id INTEGER PRIMARY KEY,
                 is_premium BOOLEAN NOT NULL DEFAULT 0,
-                premium_expiry TIMESTAMP,
+                premium_expiry INTEGER,
                 created_at TIMESTAMP,
                 updated_at TIMESTAMP,
                 max_channels INTEGER DEFAULT 0,
                 is_banned BOOLEAN NOT NULL DEFAULT 0,
                 ban_reason TEXT,
                 user_channel_id INTEGER,
-                trial_end_date TIMESTAMP,
+                trial_end_date INTEGER,
                 has_used_trial BOOLEAN NOT NULL DEFAULT 0
             )
             ''')
@@ -57,17 +121,43 @@ class Database:
             CREATE TABLE IF NOT EXISTS channels (
                 channel_id INTEGER PRIMARY KEY,
                 user_id INTEGER NOT NULL,
-                added_date TIMESTAMP NOT NULL,
-                expiry_date TIMESTAMP NOT NULL,
+                added_date INTEGER NOT NULL,
+                expiry_date INTEGER NOT NULL,
                 FOREIGN KEY (user_id) REFERENCES users(user_id)
             )
             ''')
             
+            # Indexes for the periodic expiry sweep in cleanup_expired
+            self.cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_users_premium_expiry ON users(is_premium, premium_expiry)"
+            )
+            self.cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_channels_expiry ON channels(expiry_date)"
+            )
+            # Covering index so per-user channel listings never touch the table B-tree
+            self.cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_channels_user ON channels(user_id, channel_id, added_date, expiry_date)"
+            )
             
             self.conn.commit()
+            self._migrate_timestamps()
         except Exception as e:
             logger.error(f"[❌] Error creating database tables: {e}")
             
+    def _migrate_timestamps(self) -> None:
+        """Convert legacy ISO-string expiry columns to Unix seconds (no-op once migrated)"""
+        converted = 0
+        for table, key, column in _TIMESTAMP_COLUMNS:
+            self.cursor.execute(f"SELECT {key}, {column} FROM {table} WHERE typeof({column}) = 'text'")
+            # Parsed in Python rather than with strftime('%s'): the strings are naive local time, not UTC
+            rows = [(int(datetime.fromisoformat(value).timestamp()), row_id) for row_id, value in self.cursor.fetchall()]
+            if rows:
+                self.cursor.executemany(f"UPDATE {table} SET {column} = ? WHERE {key} = ?", rows)
+                converted += len(rows)
+        if converted:
+            self.conn.commit()
+            logger.info("[🔄] Migrated %s timestamp values to Unix seconds", converted)
+            
     def _ensure_connection(self) -> bool:
         """Ensure database connection is active, reconnect if needed"""
         if self.conn is None:
@@ -78,8 +168,7 @@ class Database:
                     os.makedirs(db_dir, exist_ok=True)
                     logger.info(f"[📁] Database directory ensured at: {os.path.abspath(db_dir)}")
                 
-                self.conn = sqlite3.connect(self.DB_FILE)
-                self.cursor = self.conn.cursor()
+                self._connect()
                 self._create_tables()  # Ensure tables exist
                 logger.info("[🔄] Database connection reestablished")
                 return True
@@ -97,19 +186,14 @@ class Database:
             # Get current time
             now = datetime.now().isoformat()
             
-            # Check if user already exists
-            self.cursor.execute("SELECT user_id FROM users WHERE user_id = ?", (user_id,))
-            exists = self.cursor.fetchone()
-            
-            if not exists:
-                # Insert new user
-                self.cursor.execute(
-                    "INSERT INTO users (user_id, is_premium, premium_expiry, created_at, updated_at, max_channels) VALUES (?, ?, ?, ?, ?, ?)",
-                    (user_id, is_premium, premium_expiry.isoformat() if premium_expiry else None, now, now, max_channels)
-                )
-                logger.info(f"[✅] User {user_id} added as regular user to database")
-            
+            # Insert the user unless they already exist (one statement on the primary key)
+            self.cursor.execute(
+                "INSERT OR IGNORE INTO users (user_id, is_premium, premium_expiry, created_at, updated_at, max_channels) VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, is_premium, int(premium_expiry.timestamp()) if premium_expiry else None, now, now, max_channels)
+            )
             self.conn.commit()
+            if self.cursor.rowcount == 1:
+                logger.info("[✅] User %s added as regular user to database", user_id)
             return True
         
         except Exception as e:
@@ -124,27 +208,20 @@ class Database:
             
             now = datetime.now()
             # Premium lasts for the specified number of months
-            expiry = datetime.fromtimestamp(now.timestamp() + months * 31 * 24 * 3600)
+            expiry_ts = int(now.timestamp()) + months * 31 * 24 * 3600
             
-            # Check if the user exists
-            self.cursor.execute("SELECT user_id FROM users WHERE user_id = ?", (user_id,))
-            exists = self.cursor.fetchone()
-            
-            if exists:
-                # Update existing user
-                self.cursor.execute(
-                    "UPDATE users SET is_premium = ?, premium_expiry = ?, updated_at = ?, max_channels = ? WHERE user_id = ?",
-                    (is_premium, expiry.isoformat(), now.isoformat(), max_channels, user_id)
-                )
-            else:
-                # Create new user
-                self.cursor.execute(
-                    "INSERT INTO users (user_id, is_premium, premium_expiry, created_at, updated_at, max_channels) VALUES (?, ?, ?, ?, ?, ?)",
-                    (user_id, is_premium, expiry.isoformat(), now.isoformat(), now.isoformat(), max_channels)
-                )
-                
+            # Create the user or update the existing row in one statement
+            now_iso = now.isoformat()
+            self.cursor.execute(
+                "INSERT INTO users (user_id, is_premium, premium_expiry, created_at, updated_at, max_channels) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET is_premium = excluded.is_premium, premium_expiry = excluded.premium_expiry, "
+                "updated_at = excluded.updated_at, max_channels = excluded.max_channels",
+                (user_id, is_premium, expiry_ts, now_iso, now_iso, max_channels)
+            )
             self.conn.commit()
-            logger.info(f"[✅] User {user_id} set as {'premium' if is_premium else 'regular'} with {max_channels} channels for {months} months until {expiry.isoformat()}")
+            self.invalidate_user(user_id)
+            logger.info("[✅] User %s set as %s with %s channels for %s months until %s",
+                        user_id, 'premium' if is_premium else 'regular', max_channels, months, datetime.fromtimestamp(expiry_ts))
             return True
         except Exception as e:
             logger.error(f"[❌] Error setting premium status for user {user_id}: {e}")
@@ -158,7 +235,8 @@ class Database:
             
             now = datetime.now()
             # Trial lasts for 7 days
-            trial_expiry = datetime.fromtimestamp(now.timestamp() + 7 * 24 * 3600)
+            trial_expiry_ts = int(now.timestamp()) + 7 * 24 * 3600
+            now_iso = now.isoformat()
             
             # Check if user already used trial
             self.cursor.execute("SELECT has_used_trial FROM users WHERE user_id = ?", (user_id,))
@@ -175,17 +253,18 @@ class Database:
                 # Update existing user - set max_channels to 1 for trial
                 self.cursor.execute(
                     "UPDATE users SET trial_end_date = ?, has_used_trial = 1, max_channels = 1, updated_at = ? WHERE user_id = ?",
-                    (trial_expiry.isoformat(), now.isoformat(), user_id)
+                    (trial_expiry_ts, now_iso, user_id)
                 )
             else:
                 # Create new user with trial - set max_channels to 1
                 self.cursor.execute(
                     "INSERT INTO users (user_id, trial_end_date, has_used_trial, max_channels, created_at, updated_at) VALUES (?, ?, 1, 1, ?, ?)",
-                    (user_id, trial_expiry.isoformat(), now.isoformat(), now.isoformat())
+                    (user_id, trial_expiry_ts, now_iso, now_iso)
                 )
                 
             self.conn.commit()
-            logger.info(f"[✅] Trial started for user {user_id} until {trial_expiry.isoformat()}")
+            self.invalidate_user(user_id)
+            logger.info("[✅] Trial started for user %s until %s", user_id, datetime.fromtimestamp(trial_expiry_ts))
             return True
         except Exception as e:
             logger.error(f"[❌] Error starting trial for user {user_id}: {e}")
@@ -211,160 +290,178 @@ class Database:
             logger.error(f"[❌] Error checking trial usage for user {user_id}: {e}")
             return False
             
+    @staticmethod
+    def _effective_premium(now_ts: float, is_premium_db, premium_expiry_ts: Optional[int], trial_end_ts: Optional[int]) -> Tuple[bool, Optional[int], bool]:
+        """Resolve (is_premium, expiry_ts, is_trial) at now_ts from raw user columns; an active subscription wins over a trial"""
+        if is_premium_db and premium_expiry_ts and now_ts < premium_expiry_ts:
+            return True, premium_expiry_ts, False
+        if trial_end_ts and now_ts < trial_end_ts:
+            return True, trial_end_ts, True
+        return False, None, False
+
+    def _fetch_user_premium_row(self, user_id: int) -> Optional[Tuple[bool, Optional[int], int, bool]]:
+        """Fetch (is_premium, expiry_ts, max_channels, is_trial) for a user with one query, or None if unknown"""
+        self.cursor.execute(_SQL_GET_USER_PREMIUM, (user_id,))
+        result = self.cursor.fetchone()
+        if not result:
+            return None
+        is_premium_db, premium_expiry_ts, max_channels, trial_end_ts = result
+        is_premium, expiry_ts, is_trial = self._effective_premium(time.time(), is_premium_db, premium_expiry_ts, trial_end_ts)
+        # For trial users, set max_channels to 1 if not set
+        if is_trial and not max_channels:
+            max_channels = 1
+        return is_premium, expiry_ts, max_channels or 0, is_trial
+            
     def is_user_premium(self, user_id: int) -> bool:
         """Check if a user has premium status (including trial) and it's not expired"""
         try:
             if not self._ensure_connection():
                 return False
                 
-            self.cursor.execute(
-                "SELECT is_premium, premium_expiry, trial_end_date FROM users WHERE user_id = ?",
-                (user_id,)
-            )
-            result = self.cursor.fetchone()
-            
-            if not result:
-                return False
-                
-            is_premium, premium_expiry_str, trial_end_str = result
-            now = datetime.now()
-            
-            # Check if user has active premium subscription
-            if is_premium and premium_expiry_str:
-                premium_expiry = datetime.fromisoformat(premium_expiry_str)
-                if now < premium_expiry:
-                    return True
-            
-            # Check if user has active trial
-            if trial_end_str:
-                trial_expiry = datetime.fromisoformat(trial_end_str)
-                if now < trial_expiry:
-                    return True
-                
-            return False
+            self.cursor.execute(_SQL_IS_USER_PREMIUM, {"user_id": user_id, "now": int(time.time())})
+            return self.cursor.fetchone() is not None
         except Exception as e:
             logger.error(f"[❌] Error checking premium status for user {user_id}: {e}")
             return False
             
-    def get_user_premium_details(self, user_id: int) -> Optional[Tuple[bool, Optional[str], int, bool]]:
-        """Retrieve premium status, expiry date (as string), max channels, and trial status for a user."""
+    def get_user_premium_details(self, user_id: int) -> Optional[Tuple[bool, Optional[int], int, bool]]:
+        """Retrieve premium status, expiry date (as Unix timestamp), max channels, and trial status for a user."""
         try:
             if not self._ensure_connection():
                 return None
                 
-            self.cursor.execute(
-                "SELECT is_premium, premium_expiry, max_channels, trial_end_date FROM users WHERE user_id = ?",
-                (user_id,)
-            )
-            result = self.cursor.fetchone()
-            
-            if not result:
+            row = self._fetch_user_premium_row(user_id)
+            if not row:
                 # User not found, return default non-premium state
                 return (False, None, 0, False)
                 
-            is_premium_db, premium_expiry_str, max_channels, trial_end_str = result
-            now = datetime.now()
-            
-            # Check if user has active premium or trial
-            is_currently_premium = False
-            effective_expiry_str = None
-            is_trial = False
-            
-            # Check premium subscription first
-            if is_premium_db and premium_expiry_str:
-                try:
-                    premium_expiry_dt = datetime.fromisoformat(premium_expiry_str)
-                    if now < premium_expiry_dt:
-                        is_currently_premium = True
-                        effective_expiry_str = premium_expiry_str
-                except ValueError:
-                    logger.error(f"[❌] Invalid premium expiry date format in DB for user {user_id}: {premium_expiry_str}")
-            
-            # If no active premium, check trial
-            if not is_currently_premium and trial_end_str:
-                try:
-                    trial_expiry_dt = datetime.fromisoformat(trial_end_str)
-                    if now < trial_expiry_dt:
-                        is_currently_premium = True
-                        effective_expiry_str = trial_end_str
-                        is_trial = True
-                except ValueError:
-                    logger.error(f"[❌] Invalid trial expiry date format in DB for user {user_id}: {trial_end_str}")
-            
-            # For trial users, set max_channels to 1 if not set
-            if is_trial and (max_channels is None or max_channels == 0):
-                max_channels = 1
-            
-            # Return actual status, expiry string, max channels, and trial status
-            return (is_currently_premium, effective_expiry_str, max_channels if max_channels is not None else 0, is_trial)
+            # Return actual status, expiry timestamp, max channels, and trial status
+            return row
             
         except Exception as e:
             logger.error(f"[❌] Error getting premium details for user {user_id}: {e}")
             return None
 
+    def get_user_profile(self, user_id: int) -> UserProfile:
+        """Get ban, channel and premium status for a user in a single query (cached for USER_CACHE_TTL seconds)"""
+        now = time.time()
+        cached = self._profile_cache.get(user_id)
+        if cached and cached[0] > now:
+            return cached[1]
+            
+        try:
+            if not self._ensure_connection():
+                return DEFAULT_USER_PROFILE
+                
+            self.cursor.execute(_SQL_GET_USER_PROFILE, (user_id,))
+            result = self.cursor.fetchone()
+            
+            if not result:
+                profile = DEFAULT_USER_PROFILE
+            else:
+                is_banned, ban_reason, channel_id, is_premium_db, premium_expiry_ts, max_channels, trial_end_ts = result
+                is_premium, expiry_ts, is_trial = self._effective_premium(now, is_premium_db, premium_expiry_ts, trial_end_ts)
+                
+                # For trial users, set max_channels to 1 if not set
+                if is_trial and not max_channels:
+                    max_channels = 1
+                    
+                profile = UserProfile(
+                    bool(is_banned), ban_reason, int(channel_id) if channel_id else None,
+                    is_premium, expiry_ts, max_channels or 0, is_trial,
+                    datetime.fromtimestamp(expiry_ts).strftime("%d-%m-%Y") if expiry_ts else None
+                )
+            
+            # Never keep a premium profile cached past its expiry
+            expires_at = now + Config.USER_CACHE_TTL
+            if profile.expiry_ts:
+                expires_at = min(expires_at, profile.expiry_ts)
+            # Re-insert so the dict stays ordered oldest-first, then evict from the front
+            self._profile_cache.pop(user_id, None)
+            self._profile_cache[user_id] = (expires_at, profile)
+            if len(self._profile_cache) > Config.MAX_CACHED_PROFILES:
+                del self._profile_cache[next(iter(self._profile_cache))]
+            return profile
+        except Exception as e:
+            logger.error(f"[❌] Error getting profile for user {user_id}: {e}")
+            return DEFAULT_USER_PROFILE
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop a user's cached profile and their channels' activation state after their row changes"""
+        self._profile_cache.pop(user_id, None)
+        for channel_id in [cid for cid, entry in self._channel_active_cache.items() if entry[2] == user_id]:
+            del self._channel_active_cache[channel_id]
+
+    def _cache_channel_status(self, channel_id: int, entry: Tuple[float, bool, Optional[int]]) -> None:
+        """Store a channel's activation state, evicting the oldest entry beyond MAX_CACHED_CHANNELS"""
+        # Re-insert so the dict stays ordered oldest-first, then evict from the front
+        self._channel_active_cache.pop(channel_id, None)
+        self._channel_active_cache[channel_id] = entry
+        if len(self._channel_active_cache) > Config.MAX_CACHED_CHANNELS:
+            del self._channel_active_cache[next(iter(self._channel_active_cache))]
+
+    def invalidate_channel(self, channel_id: int) -> None:
+        """Drop a channel's cached activation state after it is added or removed"""
+        self._channel_active_cache.pop(channel_id, None)
+
     def add_channel(self, channel_id: int, user_id: int) -> bool:
         """Add a channel for a premium user"""
         try:
             if not self._ensure_connection():
                 return False
                 
-            # First check if user is premium
-            if not self.is_user_premium(user_id):
-                logger.warning(f"[⚠️] User {user_id} is not premium, cannot add channel")
-                return False
-                
-            # Get user's premium details including expiry date
-            premium_details = self.get_user_premium_details(user_id)
-            if not premium_details:
-                logger.warning(f"[⚠️] User {user_id} premium details not found")
+            # Check premium status and get the expiry date with one query
+            premium_row = self._fetch_user_premium_row(user_id)
+            if not premium_row or not premium_row[0]:
+                logger.warning("[⚠️] User %s is not premium, cannot add channel", user_id)
                 return False
                 
-            _, premium_expiry_str, _, _ = premium_details
-            if not premium_expiry_str:
-                logger.warning(f"[⚠️] User {user_id} has no premium expiry date")
+            premium_expiry_ts = premium_row[1]
+            if not premium_expiry_ts:
+                logger.warning("[⚠️] User %s has no premium expiry date", user_id)
                 return False
                 
-            premium_expiry = datetime.fromisoformat(premium_expiry_str)
-            now = datetime.now()
-            
             # Add or update channel with the same expiry date as premium
             self.cursor.execute(
                 "INSERT OR REPLACE INTO channels (channel_id, user_id, added_date, expiry_date) VALUES (?, ?, ?, ?)",
-                (channel_id, user_id, now.isoformat(), premium_expiry.isoformat())
+                (channel_id, user_id, int(time.time()), premium_expiry_ts)
             )
             self.conn.commit()
-            logger.info(f"[📺] Channel {channel_id} added for user {user_id} until {premium_expiry.isoformat()}")
+            self.invalidate_channel(channel_id)
+            logger.info("[📺] Channel %s added for user %s until %s", channel_id, user_id, datetime.fromtimestamp(premium_expiry_ts))
             return True
         except Exception as e:
             logger.error(f"[❌] Error adding channel {channel_id} for user {user_id}: {e}")
             return False
             
     def is_channel_active(self, channel_id: int) -> bool:
-        """Check if a channel is active (owned by a premium user and not expired)"""
+        """Check if a channel is active (owned by a premium user and not expired), cached for CHANNEL_CACHE_TTL seconds"""
+        now = time.time()
+        cached = self._channel_active_cache.get(channel_id)
+        if cached and cached[0] > now:
+            return cached[1]
+            
         try:
             if not self._ensure_connection():
                 return False
                 
-            self.cursor.execute(
-                "SELECT user_id, expiry_date FROM channels WHERE channel_id = ?",
-                (channel_id,)
-            )
+            self.cursor.execute(_SQL_GET_CHANNEL_STATUS, {"channel_id": channel_id, "now": int(now)})
             result = self.cursor.fetchone()
             
+            expires_at = now + Config.CHANNEL_CACHE_TTL
             if not result:
+                self._cache_channel_status(channel_id, (expires_at, False, None))
                 return False
                 
-            user_id, expiry_str = result
+            # The channel is active if it hasn't expired and its owner is still premium (evaluated in SQL)
+            user_id, expiry_ts, is_active = result
+            is_active = bool(is_active)
             
-            # Check if channel subscription is expired
-            expiry = datetime.fromisoformat(expiry_str)
-            now = datetime.now()
-            
-            if now >= expiry:
-                return False
-                
-            # Check if user is still premium
-            return self.is_user_premium(user_id)
+            # Never keep an active entry cached past the channel's expiry
+            if is_active:
+                expires_at = min(expires_at, expiry_ts)
+            self._cache_channel_status(channel_id, (expires_at, is_active, user_id))
+            return is_active
         except Exception as e:
             logger.error(f"[❌] Error checking channel {channel_id} status: {e}")
             return False
@@ -376,15 +473,18 @@ class Database:
                 return []
                 
             self.cursor.execute(
-                "SELECT channel_id FROM channels WHERE user_id = ?",
-                (user_id,)
+                "SELECT channel_id, added_date, expiry_date, expiry_date > ? FROM channels WHERE user_id = ?",
+                (int(time.time()), user_id)
             )
             channels = []
-            for row in self.cursor.fetchall():
-                channel_id = row[0]
-                channel_details = self.get_channel_details(user_id, channel_id)
-                if channel_details:
-                    channels.append(channel_details)
+            for channel_id, added_ts, expiry_ts, is_active in self.cursor.fetchall():
+                channels.append({
+                    "channel_id": channel_id,
+                    "user_id": user_id,
+                    "added_date": datetime.fromtimestamp(added_ts),
+                    "expiry_date": datetime.fromtimestamp(expiry_ts),
+                    "is_active": bool(is_active)
+                })
             return channels
         except Exception as e:
             logger.error(f"[❌] Error getting channels for user {user_id}: {e}")
@@ -397,22 +497,21 @@ class Database:
                 return None
                 
             self.cursor.execute(
-                "SELECT added_date, expiry_date FROM channels WHERE user_id = ? AND channel_id = ?",
-                (user_id, channel_id)
+                "SELECT added_date, expiry_date, expiry_date > ? FROM channels WHERE user_id = ? AND channel_id = ?",
+                (int(time.time()), user_id, channel_id)
             )
             result = self.cursor.fetchone()
             
             if not result:
                 return None # Channel not found or doesn't belong to user
                 
-            added_date_str, expiry_date_str = result
-            expiry_dt = datetime.fromisoformat(expiry_date_str)
+            added_ts, expiry_ts, is_active = result
             channel_details = {
                  "channel_id": channel_id,
                  "user_id": user_id,
-                 "added_date": datetime.fromisoformat(added_date_str),
-                 "expiry_date": expiry_dt,
-                 "is_active": datetime.now() < expiry_dt
+                 "added_date": datetime.fromtimestamp(added_ts),
+                 "expiry_date": datetime.fromtimestamp(expiry_ts),
+                 "is_active": bool(is_active)
             }
             return channel_details
             
@@ -444,17 +543,25 @@ class Database:
             
     def remove_channel(self, channel_id: int) -> bool:
         """Remove a channel from the database"""
+        return self.remove_channels((channel_id,)) is not None
+            
+    def remove_channels(self, channel_ids: Iterable[int]) -> Optional[int]:
+        """Remove several channels in one transaction and return how many rows were deleted (None on error)"""
         try:
             if not self._ensure_connection():
-                return False
+                return None
                 
-            self.cursor.execute("DELETE FROM channels WHERE channel_id = ?", (channel_id,))
+            channel_ids = list(channel_ids)
+            self.cursor.executemany("DELETE FROM channels WHERE channel_id = ?", ((channel_id,) for channel_id in channel_ids))
+            removed = self.cursor.rowcount
             self.conn.commit()
-            logger.info(f"[🗑️] Channel {channel_id} removed from database")
-            return True
+            for channel_id in channel_ids:
+                self.invalidate_channel(channel_id)
+            logger.info("[🗑️] Removed %s of %s channels from database: %s", removed, len(channel_ids), channel_ids)
+            return removed
         except Exception as e:
-            logger.error(f"[❌] Error removing channel {channel_id}: {e}")
-            return False
+            logger.error(f"[❌] Error removing channels {channel_ids}: {e}")
+            return None
             
     def upgrade_user_channels(self, user_id: int, new_max_channels: int) -> bool:
         """Upgrade a user's maximum number of allowed channels"""
@@ -465,7 +572,7 @@ class Database:
             # First check if user exists
             self.cursor.execute("SELECT user_id FROM users WHERE user_id = ?", (user_id,))
             if not self.cursor.fetchone():
-                logger.warning(f"[⚠️] Cannot upgrade max_channels for non-existent user {user_id}")
+                logger.warning("[⚠️] Cannot upgrade max_channels for non-existent user %s", user_id)
                 return False
             
             # Update the user's maximum channels
@@ -475,13 +582,14 @@ class Database:
                 (new_max_channels, now, user_id)
             )
             self.conn.commit()
+            self.invalidate_user(user_id)
             
             # Check if update happened
             success = self.cursor.rowcount > 0
             if success:
-                logger.info(f"[⬆️] Upgraded user {user_id} to {new_max_channels} max channels")
+                logger.info("[⬆️] Upgraded user %s to %s max channels", user_id, new_max_channels)
             else:
-                logger.warning(f"[⚠️] User {user_id} max_channels update had no effect (no rows modified)")
+                logger.warning("[⚠️] User %s max_channels update had no effect (no rows modified)", user_id)
             
             return success
                 
@@ -495,22 +603,37 @@ class Database:
             if not self._ensure_connection():
                 return
                 
-            now = datetime.now().isoformat()
-            
-            # Set users with expired premium to non-premium
-            self.cursor.execute(
-                "UPDATE users SET is_premium = 0 WHERE is_premium = 1 AND premium_expiry < ?",
-                (now,)
-            )
-            
-            # Clear expired trials
-            self.cursor.execute(
-                "UPDATE users SET trial_end_date = NULL WHERE trial_end_date < ?",
-                (now,)
-            )
+            now = int(time.time())
             
-            self.conn.commit()
-            logger.info("[🧹] Cleaned up expired premium statuses and trials")
+            # Run every sweep in one write transaction so it costs a single commit
+            self.cursor.execute("BEGIN IMMEDIATE")
+            try:
+                # Set users with expired premium to non-premium
+                self.cursor.execute(
+                    "UPDATE users SET is_premium = 0 WHERE is_premium = 1 AND premium_expiry < ?",
+                    (now,)
+                )
+                
+                # Clear expired trials
+                self.cursor.execute(
+                    "UPDATE users SET trial_end_date = NULL WHERE trial_end_date < ?",
+                    (now,)
+                )
+                
+                # Drop channel subscriptions that have run out
+                self.cursor.execute(
+                    "DELETE FROM channels WHERE expiry_date < ?",
+                    (now,)
+                )
+                removed_channels = self.cursor.rowcount
+                
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            self._profile_cache.clear()
+            self._channel_active_cache.clear()
+            logger.info("[🧹] Cleaned up expired premium statuses and trials, removed %s expired channels", removed_channels)
         except Exception as e:
             logger.error(f"[❌] Error cleaning up expired data: {e}")
             
@@ -540,7 +663,8 @@ class Database:
                 )
                 
             self.conn.commit()
-            logger.info(f"[🚫] User {user_id} banned with reason: {reason}")
+            self.invalidate_user(user_id)
+            logger.info("[🚫] User %s banned with reason: %s", user_id, reason)
             return True
         except Exception as e:
             logger.error(f"[❌] Error banning user {user_id}: {e}")
@@ -559,12 +683,13 @@ class Database:
                 (now, user_id)
             )
             self.conn.commit()
+            self.invalidate_user(user_id)
             
             success = self.cursor.rowcount > 0
             if success:
-                logger.info(f"[✅] User {user_id} unbanned successfully")
+                logger.info("[✅] User %s unbanned successfully", user_id)
             else:
-                logger.warning(f"[⚠️] User {user_id} not found or already unbanned")
+                logger.warning("[⚠️] User %s not found or already unbanned", user_id)
             
             return success
         except Exception as e:
@@ -618,7 +743,8 @@ class Database:
                 )
             
             self.conn.commit()
-            logger.info(f"[✅] Set channel {channel_id} for user {user_id}")
+            self.invalidate_user(user_id)
+            logger.info("[✅] Set channel %s for user %s", channel_id, user_id)
             return True
         except Exception as e:
             logger.error(f"[❌] Error setting channel for user {user_id}: {e}")
@@ -663,7 +789,8 @@ class Database:
             )
             
             self.conn.commit()
-            logger.info(f"[✅] Removed channel configuration for user {user_id}")
+            self.invalidate_user(user_id)
+            logger.info("[✅] Removed channel configuration for user %s", user_id)
             return True
         except Exception as e:
             logger.error(f"[❌] Error removing channel for user {user_id}: {e}")
@@ -7,12 +7,19 @@ This module provides decorators for common operations like:
 - Error handling
 """
 
-from functools import wraps
+from collections import OrderedDict
+from functools import wraps, lru_cache
 from pyrogram import Client
 from pyrogram.types import Message, CallbackQuery
 from utils.logger import logger
-from utils.db import db
+from utils.db import db, UserProfile
 from config import messages
+from config.config import Config
+
+# LRU of user IDs known to exist in the users table, so warm users skip the DB.
+# Rows in users are never deleted, so a remembered ID can't go stale.
+_registered_users: "OrderedDict[int, None]" = OrderedDict()
+_REGISTERED_USERS_CACHE_SIZE = Config.REGISTERED_USERS_CACHE_SIZE
 
 
 def check_user_ban(func):
@@ -31,9 +38,12 @@ def check_user_ban(func):
                 user_id = message_or_callback.from_user.id
                 user_name = message_or_callback.from_user.first_name or "Unknown"
                 
-                # Check if user is banned
-                is_banned, ban_reason = db.is_user_banned(user_id)
-                if is_banned:
+                # Check if user is banned (served from the cached profile, invalidated on ban/unban)
+                profile = db.get_user_profile(user_id)
+                # Keep the profile on the update so the handler can reuse it via get_profile()
+                message_or_callback._user_profile = profile
+                if profile.is_banned:
+                    ban_reason = profile.ban_reason
                     logger.warning(f"[🚫] Banned user {user_id} ({user_name}) attempted to use function {func.__name__}")
                     
                     # Handle response based on type
@@ -63,8 +73,13 @@ def auto_register_user(func):
             if isinstance(message_or_callback, (Message, CallbackQuery)):
                 user_id = message_or_callback.from_user.id
                 
+                if user_id in _registered_users:
+                    _registered_users.move_to_end(user_id)
                 # Add user to database if not exists
-                db.add_user(user_id, False)
+                elif db.add_user(user_id, False):
+                    _registered_users[user_id] = None
+                    if len(_registered_users) > _REGISTERED_USERS_CACHE_SIZE:
+                        _registered_users.popitem(last=False)
         
         # Execute the original function
         return await func(*args, **kwargs)
@@ -125,6 +140,15 @@ def handle_errors(error_message: str = None):
 
 # Common utility functions that were duplicated across files
 
+def get_profile(message_or_callback) -> UserProfile:
+    """Return the user profile loaded by check_user_ban for this update, falling back to the database"""
+    profile = getattr(message_or_callback, "_user_profile", None)
+    if profile is None:
+        profile = db.get_user_profile(message_or_callback.from_user.id)
+    return profile
+
+
+@lru_cache(maxsize=32)
 def get_plan_name(channels: int) -> str:
     """Returns the plan name based on the number of channels."""
     if channels >= 5:
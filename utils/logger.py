@@ -1,15 +1,40 @@
+import atexit
 import logging
+import logging.handlers
+import queue
+import sys
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOGGER_NAME = "videoresbot"
 
 def setup_logger() -> logging.Logger:
-    """Setup and configure the logger"""
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    logger = logging.getLogger(__name__)
-    
+    """Setup and configure the logger.
+    Records are handed to a QueueHandler and written to stderr by a background
+    QueueListener, so logging calls never block the event loop on I/O."""
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # Flush queued records on interpreter exit
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+
+    # The bot's own logger owns its handler and doesn't propagate, so nothing else
+    # attached to the root logger can emit its records a second time
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(logging.INFO)
+    logger.addHandler(queue_handler)
+    logger.propagate = False
+
+    # Third-party libraries (pyrogram) still reach stderr through the root logger
+    logging.getLogger().addHandler(queue_handler)
+
     # Disable pyrogram logging
     logging.getLogger("pyrogram").setLevel(logging.WARNING)
     logging.getLogger("pyrogram.client").setLevel(logging.WARNING)
     logging.getLogger("pyrogram.connection").setLevel(logging.WARNING)
-    
+
     return logger
 
-logger = setup_logger() 
\ No newline at end of file
+logger = setup_logger()
@@ -4,6 +4,10 @@ Queue and active video tracking module.
 This module handles:
 - Tracking active videos counts for users and channels
 - Managing queues of videos waiting to be processed
+
+Each operation has a `_user` and `_channel` variant for call sites that know
+the entity type up front; the generic functions index the `_queues`/`_counts`
+pairs directly with the `is_channel` bool (0 = user, 1 = channel).
 """
 
 from collections import defaultdict, deque
@@ -20,44 +24,90 @@ channel_video_queue: Dict[int, Deque] = defaultdict(deque)
 active_videos_count_users: Dict[int, int] = defaultdict(int)
 active_videos_count_channels: Dict[int, int] = defaultdict(int)
 
-def increment_active_videos(entity_id: int, is_channel: bool = False) -> None:
-    """Increment the count of active videos for a user or channel"""
-    if is_channel:
-        active_videos_count_channels[entity_id] += 1
-    else:
-        active_videos_count_users[entity_id] += 1
-        
-def decrement_active_videos(entity_id: int, is_channel: bool = False) -> None:
-    """Decrement the count of active videos for a user or channel"""
-    if is_channel:
-        if active_videos_count_channels[entity_id] > 0:
-            active_videos_count_channels[entity_id] -= 1
-    else:
-        if active_videos_count_users[entity_id] > 0:
-            active_videos_count_users[entity_id] -= 1
-            
+# (user, channel) pairs indexed by is_channel
+_queues = (user_video_queue, channel_video_queue)
+_counts = (active_videos_count_users, active_videos_count_channels)
+
+def _decrement(counts: Dict[int, int], entity_id: int) -> int:
+    """Decrement an entity's active videos count and return the remaining count.
+    The entry is dropped once it reaches zero."""
+    remaining = counts.get(entity_id, 0) - 1
+    if remaining > 0:
+        counts[entity_id] = remaining
+        return remaining
+    counts.pop(entity_id, None)
+    return 0
+
+def _append(queues: Dict[int, Deque], message, entity_id: int) -> int:
+    """Add a video message to an entity's queue and return its 1-based position"""
+    queue = queues[entity_id]
+    queue.append(message)
+    return len(queue)
+
+# --- User variants ---
+
+def increment_active_videos_user(user_id: int) -> None:
+    """Increment the count of active videos for a user"""
+    active_videos_count_users[user_id] += 1
+
+def get_active_videos_count_user(user_id: int) -> int:
+    """Get the count of active videos for a user"""
+    return active_videos_count_users.get(user_id, 0)
+
+def add_to_queue_user(message, user_id: int) -> int:
+    """Add a video message to a user's queue and return its 1-based position"""
+    return _append(user_video_queue, message, user_id)
+
+# --- Channel variants ---
+
+def increment_active_videos_channel(channel_id: int) -> None:
+    """Increment the count of active videos for a channel"""
+    active_videos_count_channels[channel_id] += 1
+
+def decrement_active_videos_channel(channel_id: int) -> int:
+    """Decrement the count of active videos for a channel and return the remaining count"""
+    return _decrement(active_videos_count_channels, channel_id)
+
+def get_active_videos_count_channel(channel_id: int) -> int:
+    """Get the count of active videos for a channel"""
+    return active_videos_count_channels.get(channel_id, 0)
+
+def add_to_queue_channel(message, channel_id: int) -> int:
+    """Add a video message to a channel's queue and return its 1-based position"""
+    return _append(channel_video_queue, message, channel_id)
+
+# --- Generic dispatchers ---
+
+def decrement_active_videos(entity_id: int, is_channel: bool = False) -> int:
+    """Decrement the count of active videos for a user or channel and return the remaining count"""
+    return _decrement(_counts[is_channel], entity_id)
+
 def get_active_videos_count(entity_id: int, is_channel: bool = False) -> int:
     """Get the count of active videos for a user or channel"""
-    if is_channel:
-        return active_videos_count_channels[entity_id]
-    else:
-        return active_videos_count_users[entity_id]
-
-def add_to_queue(message, entity_id: int, is_channel: bool = False) -> None:
-    """Add a video message to the appropriate queue"""
-    if is_channel:
-        channel_video_queue[entity_id].append(message)
-    else:
-        user_video_queue[entity_id].append(message)
-        
+    return _counts[is_channel].get(entity_id, 0)
+
 def get_next_from_queue(entity_id: int, is_channel: bool = False):
     """Get the next video message from the queue if available"""
-    queue = channel_video_queue[entity_id] if is_channel else user_video_queue[entity_id]
-    if queue:
-        return queue.popleft()  # Remove and return the leftmost item
-    return None
-    
+    queues = _queues[is_channel]
+    queue = queues.get(entity_id)
+    if not queue:
+        return None
+    message = queue.popleft()  # Remove and return the leftmost item
+    if not queue:
+        del queues[entity_id]  # Don't keep empty deques around for idle entities
+    return message
+
 def has_queued_videos(entity_id: int, is_channel: bool = False) -> bool:
     """Check if there are videos in the queue for a user or channel"""
-    queue = channel_video_queue[entity_id] if is_channel else user_video_queue[entity_id]
-    return len(queue) > 0 
\ No newline at end of file
+    return bool(_queues[is_channel].get(entity_id))
+
+def get_queue_length(entity_id: int, is_channel: bool = False) -> int:
+    """Get the number of videos waiting in the queue for a user or channel"""
+    queue = _queues[is_channel].get(entity_id)
+    return len(queue) if queue else 0
+
+def release_slot(entity_id: int, is_channel: bool = False) -> bool:
+    """Release one active video slot and return True if the entity is now idle (no active or queued videos)"""
+    if decrement_active_videos(entity_id, is_channel):
+        return False
+    return not _queues[is_channel].get(entity_id)
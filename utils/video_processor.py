@@ -6,15 +6,18 @@ This module handles video processing functionality:
 - Tracking video processing progress
 - Handling processed videos with alternative qualities
 """
+import asyncio
+import time
 from datetime import datetime, timezone, timedelta
 from pyrogram.types import Message, InputMediaVideo, InlineKeyboardMarkup, InlineKeyboardButton
 from pyrogram import raw
-from config.state import State
+from config.state import State, VideoJob
 from config.config import Config
 from config import messages
 from utils.logger import logger
-from utils.video_utils import calculate_processing_time, format_video_info
-from utils.cleanup import delete_scheduled_message, clean_up_tracking_info
+from utils.video_utils import calculate_processing_time, format_video_info, call_with_flood_wait
+from utils.cleanup import delete_scheduled_message, clean_up_tracking_info, arm_polling
+from utils.admin_reports import queue_admin_report
 
 
 async def schedule_video_to_destination(transfer_msg_id: int) -> int | None:
@@ -25,7 +28,8 @@ async def schedule_video_to_destination(transfer_msg_id: int) -> int | None:
              logger.error("[❌] DESTINATION_CHANNEL or TRANSFER_CHANNEL not configured.")
              return None
         schedule_time = datetime.now(timezone.utc) + timedelta(days=365) 
-        scheduled_msg = await State.userbot.copy_message(
+        scheduled_msg = await call_with_flood_wait(
+            State.userbot.copy_message,
             Config.DESTINATION_CHANNEL, 
             Config.TRANSFER_CHANNEL, 
             transfer_msg_id,
@@ -34,7 +38,7 @@ async def schedule_video_to_destination(transfer_msg_id: int) -> int | None:
         scheduled_msg_id = scheduled_msg.id
         logger.info(f"[✅] Scheduled message created with ID: {scheduled_msg_id}")
         
-        State.scheduled_to_transfer_map[scheduled_msg_id] = transfer_msg_id
+        State.map_scheduled_message(scheduled_msg_id, transfer_msg_id)
         logger.info(f"[🗺️] Stored mapping: Scheduled ID {scheduled_msg_id} -> Transfer ID {transfer_msg_id}")
         
         return scheduled_msg_id
@@ -42,20 +46,20 @@ async def schedule_video_to_destination(transfer_msg_id: int) -> int | None:
          logger.error(f"[❌] Failed to schedule video {transfer_msg_id}: {e}")
          return None
 
-async def track_video_progress(transfer_msg_id: int, user_id: int, scheduled_msg_id: int, original_size: int, duration: int, channel_data=None) -> None:
+async def track_video_progress(transfer_msg_id: int, user_id: int, scheduled_msg_id: int, original_size: int, duration: int, channel_data=None, caption_info=None) -> None:
     """Save tracking information for video processing in State"""
-    current_time = datetime.now()
+    current_time = time.monotonic()
     logger.info(f"[📊] Tracking video progress for Transfer ID: {transfer_msg_id}, User/Channel: {user_id if not channel_data else channel_data}")
-    # Store main video info keyed by transfer_msg_id
-    State.video_info[transfer_msg_id] = (user_id, scheduled_msg_id, current_time, original_size, duration)
+    # Channel videos are owned by (channel_id, message_id), user videos by user_id
+    owner = channel_data if channel_data else user_id
+    State.video_info[transfer_msg_id] = VideoJob(user_id, scheduled_msg_id, current_time, original_size, duration, owner, caption_info)
     
-    # Store reverse mapping (user/channel -> transfer_id) for potential lookups
-    if channel_data:
-        # For channel videos, store tuple of (channel_id, message_id)
-        State.user_videos[transfer_msg_id] = channel_data
-    else:
-        # For user videos, store user_id
-        State.user_videos[transfer_msg_id] = user_id
+    # Store reverse mapping (user -> transfer_ids) for /cancel lookups
+    if not channel_data:
+        State.user_to_transfer_ids.setdefault(user_id, set()).add(transfer_msg_id)
+    
+    # Make sure a poll cycle is scheduled now that there is something to check
+    arm_polling()
 
 
 async def send_original_video(msg: Message, user_id: int) -> bool:
@@ -79,7 +83,7 @@ async def send_original_video(msg: Message, user_id: int) -> bool:
         
         # Caption with original quality info and hint about settings button
         original_caption = f"Original quality: {msg.video.height}p\n\nℹ️ You can also tap on the video settings button to select different qualities!"
-        sent_msg = await msg.copy(user_channel, caption=original_caption)
+        sent_msg = await call_with_flood_wait(msg.copy, user_channel, caption=original_caption)
         
         # Send private message to user with inline button to video in channel
         try:
@@ -132,34 +136,43 @@ async def send_alternative_videos(msg: Message, user_id: int) -> int:
     except Exception as sig_err:
         logger.error(f"[❌] Failed to verify signature settings for channel {user_channel}: {sig_err}")
          
-    logger.info(f"[ℹ️] Found {len(msg.video.alternative_videos)} alternative videos for message {msg.id}")
+    alternatives = msg.video.alternative_videos
+    logger.info(f"[ℹ️] Found {len(alternatives)} alternative videos for message {msg.id}")
     try:
-        for i, video in enumerate(msg.video.alternative_videos): 
-            if i % 2 == 1:
+        send_video = State.bot.send_video
+        # send_original_video already delivers the original's quality
+        original_height = msg.video.height
+        # Every other entry is a duplicate encoding of the same quality
+        videos = []
+        for i in range(0, len(alternatives), 2):
+            video = alternatives[i]
+            height = video.height
+            if height and height == original_height:
+                logger.info(f"[ℹ️] Skipping {height}p alternative for user {user_id}: same quality as the original")
                 continue
-                
+            videos.append((video.file_id, f"{height}p" if height else f"Alternative {i+1}"))
+        
+        # Sent one at a time so the qualities always appear in the channel in the same order
+        for file_id, quality in videos:
             try:
-                quality = f"{video.height}p" if video.height else f"Alternative {i+1}"
-                caption = f"📹 {quality}"
-                sent_msg = await State.bot.send_video(
-                    user_channel,
-                    video.file_id,
-                    caption=caption
-                )
-                
-                
+                await send_video(user_channel, file_id, caption=f"📹 {quality}")
                 sent_count += 1
                 logger.info(f"[✅] Sent {quality} video to user {user_id}'s channel {user_channel}")
             except Exception as send_err:
-                quality_label = f"{video.height}p" if video.height else f"#{i+1}"
-                logger.error(f"[❌] Failed to send alternative video {quality_label} to user {user_id}'s channel: {send_err}")
-        
+                logger.error(f"[❌] Failed to send alternative video {quality} to user {user_id}'s channel: {send_err}")
         
         return sent_count
     except Exception as e:
         logger.error(f"[❌] Error iterating or sending alternative videos for user {user_id}'s channel: {e}")
         return sent_count # Return count sent so far
 
+async def send_processed_videos(msg: Message, user_id: int) -> tuple[bool, int]:
+    """Send the original quality, then the alternatives, to the user's channel.
+    Returns (sent_original, sent_alternatives)."""
+    sent_original = await send_original_video(msg, user_id)
+    sent_alternatives = await send_alternative_videos(msg, user_id)
+    return sent_original, sent_alternatives
+
 async def channel_has_forbidden_signatures(channel_id: int) -> bool:
     """Return True if the channel has signatures/signature_profiles enabled (both are forbidden)."""
     try:
@@ -197,24 +210,19 @@ async def handle_processed_video(transfer_msg_id: int, processed_junk_msg: Messa
     """Handles a video confirmed as processed via Junk Channel polling."""
     logger.info(f"[🏁] Handling processed video confirmed via polling. Transfer ID: {transfer_msg_id}, Junk Msg ID: {processed_junk_msg.id}")
     # --- Retrieve original tracking info --- 
-    if transfer_msg_id not in State.video_info:
+    job = State.video_info.get(transfer_msg_id)
+    if job is None:
         logger.warning(f"[⚠️] Tracking info for Transfer ID {transfer_msg_id} disappeared before processed handler could run. Aborting.")
-        scheduled_id_found = None
-        for s_id, t_id in State.scheduled_to_transfer_map.items():
-             if t_id == transfer_msg_id:
-                  scheduled_id_found = s_id
-                  break
-        if scheduled_id_found:
-             try:
-                  del State.scheduled_to_transfer_map[scheduled_id_found]
-                  logger.info(f"[🧹] Cleaned orphaned map entry for Scheduled ID {scheduled_id_found}")
-             except KeyError:
-                  pass
+        scheduled_id_found = State.unmap_transfer(transfer_msg_id)
+        if scheduled_id_found is not None:
+             logger.info(f"[🧹] Cleaned orphaned map entry for Scheduled ID {scheduled_id_found}")
         return
 
-    user_id, scheduled_msg_id, timestamp, original_size, duration = State.video_info[transfer_msg_id]
-    user_or_channel_data = State.user_videos.get(transfer_msg_id)
-    is_channel_post = isinstance(user_or_channel_data, tuple)
+    # The record is immutable, so these stay consistent even if a timeout cleans it up while we await
+    user_id, scheduled_msg_id, timestamp = job.user_id, job.scheduled_msg_id, job.timestamp
+    original_size, duration = job.original_size, job.duration
+    user_or_channel_data = job.owner
+    is_channel_post = job.is_channel
     
     # --- Ensure we have the necessary message data --- 
     if not processed_junk_msg.video:
@@ -234,7 +242,11 @@ async def handle_processed_video(transfer_msg_id: int, processed_junk_msg: Messa
          logger.info(f"[📢] Processed video (TID: {transfer_msg_id}) corresponds to channel post: {channel_id}/{original_msg_id}")
          # Edit the original channel message using the processed_junk_msg
          try:
-             await edit_channel_message_with_processed_video(channel_id, original_msg_id, processed_junk_msg)
+             # Bounded so a stuck request can't hold up cleanup and the rest of the poll cycle
+             await asyncio.wait_for(
+                 edit_channel_message_with_processed_video(channel_id, original_msg_id, processed_junk_msg, job.caption),
+                 Config.SEND_RESULTS_TIMEOUT
+             )
              edit_successful = True # Assume success if no exception
          except Exception as e:
               logger.error(f"[❌] Failed to edit channel message {original_msg_id} in {channel_id} using junk msg {processed_junk_msg.id}: {e}")
@@ -244,8 +256,10 @@ async def handle_processed_video(transfer_msg_id: int, processed_junk_msg: Messa
          logger.info(f"[👤] Processed video (TID: {transfer_msg_id}) corresponds to user: {user_id}")
          try:
              # Use the junk message to send videos back
-             sent_original = await send_original_video(processed_junk_msg, user_id)
-             sent_alternatives = await send_alternative_videos(processed_junk_msg, user_id)
+             sent_original, sent_alternatives = await asyncio.wait_for(
+                 send_processed_videos(processed_junk_msg, user_id),
+                 Config.SEND_RESULTS_TIMEOUT
+             )
              logger.info(f"[ℹ️] User {user_id} (Processed): Sent {sent_alternatives} alternative videos and original: {sent_original}")
          except Exception as e:
              logger.error(f"[❌] Error sending processed videos back to user {user_id} (TID: {transfer_msg_id}): {e}")
@@ -253,9 +267,8 @@ async def handle_processed_video(transfer_msg_id: int, processed_junk_msg: Messa
 
     # --- Reporting --- 
     try:
-        # Safe timestamp conversion
-        timestamp_dt = safe_timestamp_to_datetime(timestamp)
-        processing_time_min = (datetime.now() - timestamp_dt).total_seconds() / 60
+        # Tracking timestamps are time.monotonic() values
+        processing_time_min = (time.monotonic() - timestamp) / 60
         # Use height from the processed junk message
         estimated_time_min = calculate_processing_time(duration, processed_junk_msg.video.height)
         
@@ -277,8 +290,8 @@ async def handle_processed_video(transfer_msg_id: int, processed_junk_msg: Messa
         user_channel_info = f"👤 User ID: {user_id}" if not is_channel_post else f"📺 Channel: {channel_id}/{original_msg_id}"
         admin_report = f"{user_channel_info}\n\n{status_text}"
         
-        await State.bot.send_message(Config.ADMIN_ID, admin_report)
-        logger.info(f"[✅] Sent processing report to admin for Transfer ID: {transfer_msg_id}")
+        queue_admin_report(admin_report)
+        logger.info(f"[✅] Queued processing report to admin for Transfer ID: {transfer_msg_id}")
 
     except Exception as report_err:
         logger.error(f"[❌] Error calculating/sending admin report for {transfer_msg_id}: {report_err}")
@@ -313,24 +326,24 @@ async def handle_video_timeout(transfer_msg_id: int, user_id: int, scheduled_msg
     """Handles a video that has timed out based on tracking info in State."""
     
     logger.warning(f"[⏰] Handling timeout for Transfer ID: {transfer_msg_id}")
-    if transfer_msg_id not in State.video_info:
+    job = State.video_info.get(transfer_msg_id)
+    if job is None:
         logger.error(f"[❌] Timeout triggered for unknown Transfer ID: {transfer_msg_id}")
-        # Attempt to clean potentially orphaned user_videos entry
-        clean_up_tracking_info(transfer_msg_id, State.user_videos.get(transfer_msg_id))
+        # Attempt to clean a potentially orphaned scheduled map entry
+        clean_up_tracking_info(transfer_msg_id, None)
         return
 
-    user_or_channel_data = State.user_videos.get(transfer_msg_id)
-    is_channel_post = isinstance(user_or_channel_data, tuple)
+    user_or_channel_data = job.owner
+    is_channel_post = job.is_channel
     
-    # Safe timestamp conversion
-    timestamp_dt = safe_timestamp_to_datetime(timestamp)
-    time_diff_min = (datetime.now() - timestamp_dt).total_seconds() / 60
+    # Tracking timestamps are time.monotonic() values
+    time_diff_min = (time.monotonic() - timestamp) / 60
 
     try:
         if is_channel_post:
             channel_id, original_msg_id = user_or_channel_data
             logger.warning(f"[⏰] Channel video {channel_id}/{original_msg_id} (Transfer ID: {transfer_msg_id}) timed out after {time_diff_min:.1f} mins")
-            await State.bot.send_message(Config.ADMIN_ID, f"⏰ Channel video timeout: {channel_id}/{original_msg_id} (TID: {transfer_msg_id}) after {time_diff_min:.1f} mins.")
+            queue_admin_report(f"⏰ Channel video timeout: {channel_id}/{original_msg_id} (TID: {transfer_msg_id}) after {time_diff_min:.1f} mins.")
         else:
             # User video
             logger.warning(f"[⏰] User video {user_id} (Transfer ID: {transfer_msg_id}) timed out after {time_diff_min:.1f} mins")
@@ -341,7 +354,7 @@ async def handle_video_timeout(transfer_msg_id: int, user_id: int, scheduled_msg
             )
             await State.bot.send_message(user_id, timeout_message)
             # Also notify admin
-            await State.bot.send_message(Config.ADMIN_ID, f"⏰ User video timeout: {user_id} (TID: {transfer_msg_id}) after {time_diff_min:.1f} mins.")
+            queue_admin_report(f"⏰ User video timeout: {user_id} (TID: {transfer_msg_id}) after {time_diff_min:.1f} mins.")
 
     except Exception as notify_err:
         logger.error(f"[❌] Error notifying user/admin about timeout for {transfer_msg_id}: {notify_err}")
@@ -363,8 +376,9 @@ async def handle_video_timeout(transfer_msg_id: int, user_id: int, scheduled_msg
             except:
                 pass
 
-async def edit_channel_message_with_processed_video(channel_id: int, message_id: int, processed_msg: Message) -> None:
-    """Edits the original channel message with the processed video that has alternative qualities"""
+async def edit_channel_message_with_processed_video(channel_id: int, message_id: int, processed_msg: Message, caption_info: tuple | None = None) -> None:
+    """Edits the original channel message with the processed video that has alternative qualities.
+    caption_info is the post's (caption, caption_entities) captured at track time; without it the post is fetched."""
     try:
         # Ensure processed_msg has a video object before proceeding
         if not processed_msg.video:
@@ -373,25 +387,28 @@ async def edit_channel_message_with_processed_video(channel_id: int, message_id:
              
         logger.info(f"[🔄] Attempting to edit channel message {message_id} in channel {channel_id} with processed video {processed_msg.id}")
         
-        # Get original message info (Use bot client to get message from channel)
-        original_msg = await State.bot.get_messages(channel_id, message_id)
-        if not original_msg:
-            logger.error(f"[❌] Failed to get original message {message_id} from channel {channel_id}")
-            return
+        if caption_info is None:
+            # Get original message info (Use bot client to get message from channel)
+            original_msg = await State.bot.get_messages(channel_id, message_id)
+            if not original_msg:
+                logger.error(f"[❌] Failed to get original message {message_id} from channel {channel_id}")
+                return
+            caption_info = (original_msg.caption, original_msg.caption_entities)
             
         # Keep original caption if it exists
-        caption = original_msg.caption or ""
+        caption, caption_entities = caption_info
         
         # Create InputMediaVideo object for editing using the processed message's file_id
         media = InputMediaVideo(
             media=processed_msg.video.file_id,
-            caption=caption,
+            caption=caption or "",
             # Use caption_entities from the original message if they exist
-            caption_entities=original_msg.caption_entities if original_msg.caption_entities else None 
+            caption_entities=caption_entities or None
         )
         
         # Edit the message
-        await State.bot.edit_message_media(
+        await call_with_flood_wait(
+            State.bot.edit_message_media,
             chat_id=channel_id,
             message_id=message_id,
             media=media
@@ -449,7 +466,8 @@ async def forward_to_transfer_channel(message: Message) -> Message | None:
             ])
         
         # Copy message with the new caption and inline keyboard
-        transfer_msg = await message.copy(
+        transfer_msg = await call_with_flood_wait(
+            message.copy,
             Config.TRANSFER_CHANNEL, 
             caption=new_caption,
             reply_markup=reply_markup
@@ -472,14 +490,3 @@ async def notify_admin_critical_error(error_message: str, context: str = "") ->
             logger.info(f"[🚨] Sent critical error notification to admin: {error_message}")
     except Exception as e:
         logger.error(f"[❌] Failed to send critical error notification to admin: {e}")
-
-
-def safe_timestamp_to_datetime(timestamp) -> datetime:
-    """Safely convert timestamp to datetime object, handling both float and datetime inputs"""
-    if isinstance(timestamp, datetime):
-        return timestamp
-    elif isinstance(timestamp, (int, float)):
-        return datetime.fromtimestamp(timestamp)
-    else:
-        logger.error(f"[❌] Invalid timestamp type: {type(timestamp)}, value: {timestamp}")
-        return datetime.now()  # Fallback to current time
@@ -1,12 +1,42 @@
 import os
 import asyncio
-from asyncio.subprocess import PIPE
+import bisect
+import math
+import time
+from collections import OrderedDict
+from asyncio.subprocess import PIPE, DEVNULL
 from config.config import Config
 from utils.logger import logger
 from pyrogram.types import Message
 from config.state import State
 from pyrogram import errors
 
+# Number of qualities produced (original included) for heights below 720, below 1080, and 1080+
+_QUALITY_HEIGHT_STEPS = (720, 1080)
+_QUALITY_COUNTS = (
+    2,  # Original + 480p
+    3,  # Original + 720p, 480p
+    4,  # Original + 1080p, 720p, 480p
+)
+
+# LRU of detected codecs keyed by file_unique_id, so re-sent videos skip the download and ffprobe
+_codec_cache: "OrderedDict[str, str]" = OrderedDict()
+
+# Last is_userbot_connected result per client: {id(app): (checked_at monotonic, connected)}
+_userbot_status: "dict[int, tuple[float, bool]]" = {}
+
+async def call_with_flood_wait(func, *args, **kwargs):
+    """Await a Telegram API call, retrying it once after a FloodWait of up to MAX_FLOOD_WAIT seconds.
+    Pyrogram only sleeps through short waits itself; longer ones are raised to the caller."""
+    try:
+        return await func(*args, **kwargs)
+    except errors.FloodWait as fw:
+        if fw.value > Config.MAX_FLOOD_WAIT:
+            raise
+        logger.warning(f"[⏳] FloodWait of {fw.value}s on {getattr(func, '__name__', func)}; retrying after the wait")
+        await asyncio.sleep(fw.value)
+        return await func(*args, **kwargs)
+
 async def run_cmd(*args, **kwargs):
     """Run a command asynchronously and return the process"""
     return await asyncio.create_subprocess_exec(*args, **kwargs)
@@ -29,41 +59,55 @@ async def get_video_info(bot, media, limit=5):
     # Get the file extension for format detection
     file_ext = os.path.splitext(media.file_name)[1].lower().lstrip('.')
     
-    des_path = os.path.join(os.getcwd(), media.file_name)
+    # The codec depends only on the file contents; the extension comes from this message's file name
+    unique_id = getattr(media, "file_unique_id", None)
+    if unique_id in _codec_cache:
+        _codec_cache.move_to_end(unique_id)
+        return _codec_cache[unique_id], file_ext
     
+    process = None
     try:
-        # Open file in binary append mode
-        with open(des_path, "wb") as f:
+        # Run ffprobe on stdin and feed it the downloaded chunks directly (no temporary file)
+        process = await run_cmd("ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries", "stream=codec_name", "-of", "default=nw=1", "pipe:0", stdin=PIPE, stdout=PIPE, stderr=DEVNULL)
+        
+        try:
             # Get first chunks of the file
             logger.info(f"[🔍] Downloading first {limit} chunks of the file")
-            chunk_count = 0
             async for chunk in bot.stream_media(media, limit=limit):
-                # Write the chunk synchronously
-                f.write(chunk)
-                chunk_count += 1
+                process.stdin.write(chunk)
+                await process.stdin.drain()
             
             # Get last chunks of the file
             logger.info(f"[🔍] Downloading last {limit} chunks of the file")
             async for chunk in bot.stream_media(media, offset=-limit):
-                # Write the chunk synchronously
-                f.write(chunk)
-        
-        # Run ffprobe to get codec
-        process = await run_cmd("ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries", "stream=codec_name", "-of", "default=nw=1", des_path, stdout=PIPE)
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # ffprobe already found what it needed and closed its input
+            pass
+
+        # Signal EOF; communicate() only closes stdin when it is given input itself
+        process.stdin.close()
         stdout, _ = await process.communicate()
         codec = stdout.decode().strip().replace("codec_name=", "").lower()
         
+        if codec and unique_id:
+            _codec_cache[unique_id] = codec
+            if len(_codec_cache) > Config.CODEC_CACHE_SIZE:
+                _codec_cache.popitem(last=False)
+        
         return codec, file_ext
     except Exception as e:
         logger.error(f"Error in get_video_info: {e}")
         return None, None
     finally:
-        # Clean up file after use
-        try:
-            if os.path.exists(des_path):
-                os.remove(des_path)
-        except Exception as e:
-            logger.error(f"Error removing temporary file: {e}")
+        # Don't leave ffprobe running if the download failed part-way
+        if process is not None and process.returncode is None:
+            try:
+                process.kill()
+                await process.wait()
+            except ProcessLookupError:
+                pass
 
 def calculate_processing_time(duration: int, height: int) -> int:
     """
@@ -77,22 +121,11 @@ def calculate_processing_time(duration: int, height: int) -> int:
         int: Estimated processing time in minutes (rounded up)
     """
     # Calculate number of qualities based on video height
-    if height >= 1080:
-        num_qualities = 4  # Original + 1080p, 720p, 480p
-    elif height >= 720:
-        num_qualities = 3  # Original + 720p, 480p
-    else:
-        num_qualities = 2  # Original + 480p
-        
-    # Convert duration to minutes
-    duration_minutes = duration / 60
+    num_qualities = _QUALITY_COUNTS[bisect.bisect_right(_QUALITY_HEIGHT_STEPS, height)]
     
-    # Calculate processing time in minutes
+    # Calculate processing time in minutes, rounded up
     # Formula: 0.033 × (Duration in minutes × Number of qualities)
-    processing_time = Config.K * (duration_minutes * num_qualities)
-    
-    # Round up to nearest integer
-    return int(processing_time + 0.99)
+    return math.ceil(Config.K * duration * num_qualities / 60)
 
 
 async def check_video_size(video, source_info="") -> bool:
@@ -131,31 +164,45 @@ async def check_video_codec_format(video, source_info="") -> bool:
         logger.error(f"[⚠️] Error detecting codec/format {source_info}: {e}. Allowing processing.")
         return True # Allow processing on error
 
+async def validate_video(video, source_info="") -> bool:
+    """Check size first and only probe the codec/format if it passes, so oversized videos never reach ffprobe"""
+    if not await check_video_size(video, source_info):
+        logger.info(f"[❌] Video {source_info} is too large. Skipping.")
+        return False
+    return await check_video_codec_format(video, source_info)
+
 
 def format_video_info(original_size: int, duration: int, processing_time: float, estimated_time: float, sent_qualities: int) -> str:
-    """Format video information for the status message."""
-    try:
-        # Ensure all numeric variables have the correct type or handle errors
-        duration_min = int(duration // 60) if duration else 0
-        duration_sec = int(duration % 60) if duration else 0
-        size_mb = float(original_size / (1024*1024)) if original_size else 0.0
-        proc_time_min = float(processing_time) if processing_time is not None else 0.0
-        est_time_min = float(estimated_time) if estimated_time is not None else 0.0
-        qual_sent = int(sent_qualities) if sent_qualities is not None else 0
-        
-        return (
-            f"🎬 **Original Size:** {size_mb:.2f} MB\n"
-            f"⏱️ **Duration:** {duration_min}:{duration_sec:02d}\n"
-            f"⚙️ **Processing Time:** {proc_time_min:.2f} minutes\n"
-            f"🔄 **Estimated Time:** {est_time_min:.1f} minutes\n"
-            f"🎞️ **Qualities Sent:** {qual_sent}"
-        )
-    except Exception as e:
-         logger.error(f"[❌] Error formatting video info: {e}")
-         return "Error formatting video details."
+    """Format video information for the status message.
+    Callers build admin reports inside their own error handling, so bad input surfaces there."""
+    # Missing values are shown as zero
+    duration = int(duration or 0)
+    duration_min, duration_sec = divmod(duration, 60)
+    size_mb = original_size / (1024*1024) if original_size else 0.0
+    
+    # A single f-string is compiled once with the module, so there is no template to cache
+    return (
+        f"🎬 **Original Size:** {size_mb:.2f} MB\n"
+        f"⏱️ **Duration:** {duration_min}:{duration_sec:02d}\n"
+        f"⚙️ **Processing Time:** {processing_time or 0.0:.2f} minutes\n"
+        f"🔄 **Estimated Time:** {estimated_time or 0.0:.1f} minutes\n"
+        f"🎞️ **Qualities Sent:** {int(sent_qualities or 0)}"
+    )
 
 async def is_userbot_connected(app):
-    """Returns True if the userbot session is valid and connected, False otherwise."""
+    """Returns True if the userbot session is valid and connected, False otherwise.
+    The answer is reused for USERBOT_STATUS_TTL seconds, so deleting scheduled messages after
+    every processed video doesn't cost a get_me round trip each time."""
+    now = time.monotonic()
+    cached = _userbot_status.get(id(app))
+    if cached is not None and now - cached[0] < Config.USERBOT_STATUS_TTL:
+        return cached[1]
+    connected = await _check_userbot_session(app)
+    _userbot_status[id(app)] = (now, connected)
+    return connected
+
+async def _check_userbot_session(app) -> bool:
+    """Calls get_me to check whether the userbot session is valid and connected."""
     try:
         await app.get_me()
     except (